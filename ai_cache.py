@@ -0,0 +1,230 @@
+"""
+Content-addressed cache for OpenAI results.
+
+Two levels are used by the pipeline:
+- transcripts: SHA-256 of the audio bytes -> Whisper transcript
+- extractions: hash of (model, prompt, transcript) -> extraction JSON string
+
+Each level has an in-memory LRU tier in front of an on-disk tier, both bounded
+by size in bytes, and counts hits and misses.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "FORGET_ME_NOT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"),
+)
+
+
+def audio_key(audio_bytes: bytes) -> str:
+    return hashlib.sha256(audio_bytes).hexdigest()
+
+
+def prompt_key(text: str, prompt: str, model: str) -> str:
+    payload = json.dumps([model, prompt, text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TieredCache:
+    """
+    String cache with a memory LRU tier and an optional disk tier.
+    Memory hits are served without touching the disk; disk hits are promoted to memory.
+    """
+
+    def __init__(self, name: str, memory_max_bytes: int = 8 * 1024 * 1024,
+                 disk_dir: str = None, disk_max_bytes: int = 256 * 1024 * 1024):
+        self.name = name
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_dir = os.path.join(disk_dir, name) if disk_dir else None
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+    def get(self, key: str):
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return value
+
+            value = self._disk_get(key)
+            if value is not None:
+                self.hits["disk"] += 1
+                self._memory_set(key, value)
+                return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._memory_set(key, value)
+            self._disk_set(key, value)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            value = self._memory.pop(key, None)
+            if value is not None:
+                self._memory_bytes -= len(value.encode("utf-8"))
+            path = self._disk_path(key)
+            if path and os.path.exists(path):
+                self._disk_bytes -= os.path.getsize(path)
+                os.remove(path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+            return {
+                "name": self.name,
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # -------------------------------------------------------------------------
+    # Memory tier
+    # -------------------------------------------------------------------------
+    def _memory_set(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.memory_max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old.encode("utf-8"))
+        self._memory[key] = value
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted.encode("utf-8"))
+
+    # -------------------------------------------------------------------------
+    # Disk tier (one file per key; mtime doubles as the LRU clock)
+    # -------------------------------------------------------------------------
+    def _disk_path(self, key: str):
+        if not self.disk_dir:
+            return None
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _disk_get(self, key: str):
+        path = self._disk_path(key)
+        if not path:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return value
+
+    def _disk_set(self, key: str, value: str):
+        path = self._disk_path(key)
+        if not path:
+            return
+        data = value.encode("utf-8")
+        if len(data) > self.disk_max_bytes:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            self._disk_bytes -= os.path.getsize(path)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._disk_bytes += len(data)
+        if self._disk_bytes > self.disk_max_bytes:
+            self._disk_evict()
+
+    def _disk_evict(self):
+        # Oldest first until we are back under 90% of the budget
+        target = self.disk_max_bytes * 0.9
+        for path, size, _ in sorted(self._disk_entries(), key=lambda entry: entry[2]):
+            if self._disk_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._disk_bytes -= size
+
+
+class PipelineCache:
+    """
+    The two cache levels used by pipeline.People.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, memory_max_bytes: int = 8 * 1024 * 1024,
+                 disk_max_bytes: int = 256 * 1024 * 1024):
+        self.transcripts = TieredCache("transcripts", memory_max_bytes, cache_dir, disk_max_bytes)
+        self.extractions = TieredCache("extractions", memory_max_bytes, cache_dir, disk_max_bytes)
+
+    def stats(self) -> list:
+        return [self.transcripts.stats(), self.extractions.stats()]
+
+
+class TTLCache:
+    """
+    Small thread-safe cache whose entries expire after `ttl_seconds`.
+    Used for results that should be reused across reruns but not forever.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
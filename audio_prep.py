@@ -0,0 +1,179 @@
+"""
+Voice-note preprocessing before upload to Whisper.
+
+WAV recordings are decoded once, downmixed to mono, resampled to 16 kHz
+(all Whisper uses), trimmed of leading/trailing silence and re-encoded. With
+the optional `soundfile` package installed the result is FLAC; otherwise it is
+16-bit PCM WAV, which is still far smaller than a stereo 44.1/48 kHz original.
+
+Anything that is not PCM WAV (mp3, m4a, ...) is already compressed and is
+passed through untouched, as is anything we fail to decode.
+"""
+import io
+import os
+import wave
+
+import numpy as np
+
+import metrics
+
+TARGET_SAMPLE_RATE = 16_000
+# Frames quieter than this (relative to full scale) count as silence
+SILENCE_DBFS = -45.0
+SILENCE_FRAME_SECONDS = 0.02
+# Silence kept either side of the speech so words are not clipped
+SILENCE_PADDING_SECONDS = 0.25
+
+
+class PreparedAudio:
+    """
+    The bytes to play back and upload (one shared buffer), with what it took to get there.
+    """
+
+    def __init__(self, data: bytes, filename: str, mime: str, original_bytes: int,
+                 duration_s: float = None, trimmed_s: float = 0.0):
+        self.data = data
+        self.filename = filename
+        self.mime = mime
+        self.original_bytes = original_bytes
+        self.duration_s = duration_s
+        self.trimmed_s = trimmed_s
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+    def summary(self) -> str:
+        if self.bytes_saved <= 0:
+            return f"{len(self.data) / 1024:.0f} KB, uploaded as recorded"
+        percent = 100 * self.bytes_saved / self.original_bytes
+        text = f"{self.original_bytes / 1024:.0f} KB → {len(self.data) / 1024:.0f} KB ({percent:.0f}% smaller)"
+        if self.trimmed_s >= 0.05:
+            text += f", {self.trimmed_s:.1f} s of silence trimmed"
+        return text
+
+
+def _passthrough(audio_bytes: bytes, filename: str) -> PreparedAudio:
+    extension = os.path.splitext(filename)[1].lower().lstrip(".") or "wav"
+    mime = {"mp3": "audio/mpeg", "m4a": "audio/mp4"}.get(extension, f"audio/{extension}")
+    return PreparedAudio(audio_bytes, filename, mime, len(audio_bytes))
+
+
+def _decode_wav(audio_bytes: bytes):
+    """
+    (mono float32 samples in [-1, 1], sample rate). Raises wave.Error for non-PCM input.
+    """
+    with wave.open(io.BytesIO(audio_bytes), "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints & 0x800000, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / (1 << 23)
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / (1 << 31)
+    else:
+        raise wave.Error(f"unsupported sample width {width}")
+
+    if channels > 1:
+        samples = samples[: len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def _resample(samples: np.ndarray, rate: int, target: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    if rate == target or len(samples) == 0:
+        return samples
+    ratio = rate / target
+    if ratio > 1:
+        # Box low-pass before decimating, enough to keep speech free of aliasing artefacts
+        width = int(round(ratio))
+        if width > 1:
+            samples = np.convolve(samples, np.full(width, 1 / width, dtype=np.float32), mode="same")
+    positions = np.arange(0, len(samples), ratio, dtype=np.float64)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def trim_silence(samples: np.ndarray, rate: int) -> np.ndarray:
+    """
+    Drop leading and trailing frames quieter than SILENCE_DBFS, keeping some padding.
+    Returns an empty array if the whole recording is silent.
+    """
+    frame = max(1, int(rate * SILENCE_FRAME_SECONDS))
+    count = len(samples) // frame
+    if count == 0:
+        return samples
+    rms = np.sqrt(np.mean(samples[: count * frame].reshape(count, frame) ** 2, axis=1))
+    loud = np.flatnonzero(rms > 10 ** (SILENCE_DBFS / 20))
+    if len(loud) == 0:
+        return samples[:0]
+    padding = int(rate * SILENCE_PADDING_SECONDS)
+    start = max(0, loud[0] * frame - padding)
+    end = min(len(samples), (loud[-1] + 1) * frame + padding)
+    return samples[start:end]
+
+
+def _encode(samples: np.ndarray, rate: int, stem: str):
+    """
+    (bytes, filename, mime) of the samples as FLAC if soundfile is available, else 16-bit WAV.
+    """
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    try:
+        import soundfile
+    except ImportError:
+        soundfile = None
+    if soundfile is not None:
+        soundfile.write(buffer, pcm, rate, format="FLAC", subtype="PCM_16")
+        return buffer.getvalue(), stem + ".flac", "audio/flac"
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue(), stem + ".wav", "audio/wav"
+
+
+def prepare_audio(audio_bytes: bytes, filename: str = "voice_note.wav") -> PreparedAudio:
+    """
+    Decode, downmix, resample, trim and re-encode a WAV recording. The result
+    is only used if it is smaller than the original.
+    """
+    if audio_bytes[:4] != b"RIFF" or audio_bytes[8:12] != b"WAVE":
+        return _passthrough(audio_bytes, filename)
+
+    with metrics.span("preprocess_audio") as attrs:
+        try:
+            samples, rate = _decode_wav(audio_bytes)
+        except (wave.Error, EOFError, ValueError):
+            attrs["decoded"] = False
+            return _passthrough(audio_bytes, filename)
+
+        samples = _resample(samples, rate)
+        duration = len(samples) / TARGET_SAMPLE_RATE
+        trimmed = trim_silence(samples, TARGET_SAMPLE_RATE)
+        if len(trimmed) == 0:
+            # All silence: let Whisper see the original rather than an empty file
+            return _passthrough(audio_bytes, filename)
+
+        data, new_filename, mime = _encode(trimmed, TARGET_SAMPLE_RATE, os.path.splitext(filename)[0])
+        if len(data) >= len(audio_bytes):
+            return _passthrough(audio_bytes, filename)
+
+        prepared = PreparedAudio(
+            data, new_filename, mime, len(audio_bytes),
+            duration_s=duration, trimmed_s=duration - len(trimmed) / TARGET_SAMPLE_RATE,
+        )
+        attrs.update(
+            original_bytes=len(audio_bytes), prepared_bytes=len(data),
+            source_rate=rate, trimmed_s=round(prepared.trimmed_s, 3),
+        )
+        metrics.inc("audio_bytes_saved_total", prepared.bytes_saved)
+        return prepared
@@ -0,0 +1,6 @@
+"""
+Benchmarks for Basil: a local OpenAI stand-in, synthetic data and scripted scenarios.
+
+    python -m bench.run --sizes 1000,10000
+    python -m bench.openai_stub --port 8089 --latency-ms 300
+"""
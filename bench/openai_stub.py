@@ -0,0 +1,300 @@
+"""
+Local HTTP stand-in for the OpenAI endpoints Basil uses:
+/v1/audio/transcriptions, /v1/chat/completions (plain and streamed) and /v1/embeddings.
+
+Answers are deterministic and shaped like the real ones, with configurable
+latency and a configurable share of 429 rate-limit failures. Point a client at
+it with base_url=stub.url (or OPENAI_BASE_URL for the app itself):
+
+    python -m bench.openai_stub --port 8089 --latency-ms 300 --failure-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 streamlit run streamlit_app.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.synthetic import people_for_note, transcript_for
+
+_NOTE_HEADER = re.compile(rb"BASIL-NOTE:(\d+):(\d+):(\d+):")
+_MET = re.compile(r"Just met (.+?) at the meetup\. They are (.+?)\. Next time: (.+?)\.")
+_SUGGESTIONS = [
+    "Invite them to a painting workshop",
+    "Share interesting tech articles",
+    "Send tickets for the next match",
+    "Grab coffee and swap book recommendations",
+]
+
+
+def _profile_from_text(text: str) -> dict:
+    match = _MET.search(text)
+    if not match:
+        return {"Name": "", "last_recommendation": "", "other_interesting_items": text[:80]}
+    name, interests, recommendation = match.groups()
+    return {"Name": name, "last_recommendation": recommendation, "other_interesting_items": interests}
+
+
+def _people_from_text(text: str) -> list:
+    # Shaped like pipeline.ContentFormat
+    return [
+        {"name": name, "last_recommendation": recommendation, "other_interesting_items": interests}
+        for name, interests, recommendation in _MET.findall(text)
+    ]
+
+
+class StubState:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, failure_rate: float = 0.0,
+                 tokens_per_chunk: int = 4, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.tokens_per_chunk = tokens_per_chunk
+        self.requests = {}
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def count(self, endpoint: str) -> bool:
+        """
+        Record a request; returns False if this one should fail with a 429.
+        """
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            fail = self._rng.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        time.sleep(delay)
+        return not fail
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: StubState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: dict, status: int = 200, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            # A pooled keep-alive connection closed by the client between requests
+            pass
+
+    def do_POST(self):
+        try:
+            self._handle_post()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. its timeout fired before our latency elapsed)
+            pass
+
+    def _handle_post(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?")[0].rstrip("/")
+        endpoint = path.rsplit("/v1", 1)[-1]
+        if not self.state.count(endpoint):
+            self._send_json(
+                {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                status=429,
+                headers={"retry-after-ms": "50"},
+            )
+            return
+        if endpoint == "/audio/transcriptions":
+            self._transcription(body)
+        elif endpoint == "/chat/completions":
+            self._chat(json.loads(body))
+        elif endpoint == "/embeddings":
+            self._embeddings(json.loads(body))
+        else:
+            self._send_json({"error": {"message": f"Unknown endpoint {path}"}}, status=404)
+
+    # -------------------------------------------------------------------------
+    # Endpoints
+    # -------------------------------------------------------------------------
+    def _transcription(self, body: bytes):
+        match = _NOTE_HEADER.search(body)
+        if match:
+            seed, i, count = (int(group) for group in match.groups())
+            text = " ".join(transcript_for(contact) for contact in people_for_note(seed, i, count))
+        else:
+            digest = hashlib.sha256(body).hexdigest()[:8]
+            text = f"Just met Guest {digest} at the meetup. They are into photography. Next time: Lunch."
+        self._send_json({"text": text})
+
+    def _answer(self, request: dict) -> str:
+        prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+        schema = ((request.get("response_format") or {}).get("json_schema") or {}).get("name")
+        if schema == "PeopleBatchFormat":
+            texts = re.split(r"Text \d+: ", prompt)[1:]
+            return json.dumps({"texts": [{"people": _people_from_text(text)} for text in texts]})
+        if schema == "SuggestionBatchFormat":
+            count = len(re.findall(r"Person \d+: ", prompt))
+            return json.dumps({"people": [{"number": n + 1, "suggestions": _SUGGESTIONS[:3]} for n in range(count)]})
+        if schema == "PeopleFormat":
+            return json.dumps({"people": _people_from_text(prompt)})
+        if "Each numbered text below" in prompt:
+            texts = re.split(r"Text \d+: ", prompt)[1:]
+            return json.dumps([_profile_from_text(text) for text in texts])
+        if "extract" in prompt.lower():
+            return json.dumps(_profile_from_text(prompt))
+        return json.dumps(_SUGGESTIONS[:3])
+
+    def _chat(self, request: dict):
+        content = self._answer(request)
+        model = request.get("model", "stub")
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": sum(len(str(m.get("content", "")).split()) for m in request.get("messages", [])),
+            "completion_tokens": len(content.split()),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        if not request.get("stream"):
+            self._send_json({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        step = 4 * self.state.tokens_per_chunk
+        pieces = [content[i:i + step] for i in range(0, len(content), step)]
+        for i, piece in enumerate(pieces + [None]):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": piece} if piece is not None else {},
+                    "finish_reason": None if piece is not None else "stop",
+                }],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            if piece is not None and self.state.latency_ms:
+                # Spread a little generation time over the stream
+                time.sleep(self.state.latency_ms / 1000 / max(1, len(pieces)) / 4)
+        if (request.get("stream_options") or {}).get("include_usage"):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _embeddings(self, request: dict):
+        inputs = request.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        data = []
+        for i, text in enumerate(inputs):
+            rng = random.Random(hashlib.sha256(str(text).encode("utf-8")).digest())
+            data.append({"object": "embedding", "index": i, "embedding": [rng.uniform(-1, 1) for _ in range(64)]})
+        self._send_json({
+            "object": "list",
+            "data": data,
+            "model": request.get("model", "stub"),
+            "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+        })
+
+
+class StubServer:
+    """
+    Runs the stub on a background thread:
+
+        with StubServer(latency_ms=200) as stub:
+            client = OpenAI(api_key="stub", base_url=stub.url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **state_options):
+        self.state = StubState(**state_options)
+        handler = type("Handler", (_Handler,), {"state": self.state})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def serve_forever(self):
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    args = parser.parse_args(argv)
+
+    server = StubServer(
+        args.host, args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, failure_rate=args.failure_rate,
+    )
+    print(f"OpenAI stub listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
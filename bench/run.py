@@ -0,0 +1,360 @@
+"""
+Benchmark scenarios for Basil, run against synthetic data and the local OpenAI stub.
+
+    python -m bench.run --sizes 1000,10000
+    python -m bench.run --sizes 100000 --scenarios search,curate_save --json results.json
+
+Scenarios (each reports throughput, p50/p99 latency and peak traced memory):
+
+    ingestion       voice notes through the JobQueue (transcribe, extract, resolve, write)
+    complete_rerun  Streamlit reruns of the Complete tab with the store at N contacts
+    curate_save     Curate snapshot load plus a one-cell versioned save
+    search          name type-ahead, store LIKE search and "who would like this?" queries
+    frame_memory    building the typed contacts frame for the whole store, and its size
+                    next to a plain object-column frame of the same rows
+    scheduler       interactive chat latency through the request scheduler: idle, while
+                    background calls saturate the model's rate limit, and under the same
+                    load with priorities switched off (everything queued in arrival order)
+
+Latencies are measured without tracing; peak memory comes from one extra
+traced pass, so tracemalloc's overhead never shows up in the timings.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# The app reads these at import time, so they have to be set before anything imports it
+_WORKDIR = tempfile.mkdtemp(prefix="basil-bench-")
+_APP_DB = os.path.join(_WORKDIR, "app.db")
+os.environ["FORGET_ME_NOT_DB"] = _APP_DB
+os.environ["FORGET_ME_NOT_CACHE_DIR"] = os.path.join(_WORKDIR, "cache")
+
+from bench.openai_stub import StubServer  # noqa: E402
+from bench.synthetic import generate_audio_notes, populate_store  # noqa: E402
+from clients import get_client  # noqa: E402
+from contact_store import ContactStore  # noqa: E402
+
+SCENARIOS = ["ingestion", "complete_rerun", "curate_save", "search", "frame_memory", "scheduler"]
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+SEARCH_QUERIES = ["al", "bob", "pri", "tanaka", "mat", "o'n", "zz", "nadia g"]
+IDEA_QUERIES = ["a jazz gig on Friday", "tickets for the Arsenal match", "a painting workshop", "new sushi place"]
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(scenario: str, size: int, latencies: list, wall_seconds: float, peak_bytes: int, **extra) -> dict:
+    return {
+        "scenario": scenario,
+        "size": size,
+        "ops": len(latencies),
+        "throughput_per_s": len(latencies) / wall_seconds if wall_seconds else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "peak_mb": peak_bytes / 1024 / 1024,
+        **extra,
+    }
+
+
+def timed(fn, repeat: int) -> tuple:
+    """
+    Run `fn` `repeat` times; returns (per-call latencies, wall seconds).
+    """
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_started)
+    return latencies, time.perf_counter() - started
+
+
+def traced_peak(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def populated_store(path: str, size: int, seed: int = 0) -> ContactStore:
+    if os.path.exists(path):
+        os.remove(path)
+    store = ContactStore(path)
+    populate_store(store, size, seed=seed)
+    return store
+
+
+# -----------------------------------------------------------------------------
+# Scenarios
+# -----------------------------------------------------------------------------
+def bench_ingestion(size: int, stub: StubServer, notes: int = 50, workers: int = 4, people_per_note: int = 1) -> dict:
+    from dedupe import Resolver
+    from jobs import DONE, FINISHED_STATUSES, JobQueue
+
+    store = populated_store(os.path.join(_WORKDIR, f"ingestion-{size}.db"), size)
+    client = get_client("stub", base_url=stub.url)
+    resolver = Resolver.from_store(store)
+    audio = generate_audio_notes(notes, seed=size, people_per_note=people_per_note)
+
+    def run(batch):
+        queue = JobQueue(store, resolver=resolver, max_workers=workers)
+        ids = [queue.submit(data, client=client, label=name) for name, data in batch]
+        while True:
+            jobs = [queue.get(job_id) for job_id in ids]
+            if all(job["status"] in FINISHED_STATUSES for job in jobs):
+                break
+            time.sleep(0.005)
+        queue.shutdown()
+        return jobs
+
+    started = time.perf_counter()
+    jobs = run(audio)
+    wall = time.perf_counter() - started
+    latencies = [job["updated_at"] - job["created_at"] for job in jobs if job["status"] == DONE]
+    warm = generate_audio_notes(min(notes, 10), seed=size + 1, people_per_note=people_per_note)
+    peak = traced_peak(lambda: run(warm))
+    store.close()
+    return summarize(
+        "ingestion", size, latencies, wall, peak,
+        failed=sum(job["status"] != DONE for job in jobs), workers=workers, people_per_note=people_per_note,
+    )
+
+
+def bench_complete_rerun(size: int, stub: StubServer, reruns: int = 20) -> dict:
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # The app's store and indexes are process-wide resources; start each size from scratch
+    st.cache_resource.clear()
+    populated_store(_APP_DB, size).close()
+    os.environ["OPENAI_BASE_URL"] = stub.url
+
+    app = AppTest.from_file(APP_PATH, default_timeout=600)
+    app.session_state["openai_api_key"] = "stub"
+    app.run()
+    app.sidebar.radio[1].set_value("Complete")
+
+    cold_started = time.perf_counter()
+    app.run()
+    cold = time.perf_counter() - cold_started
+    if app.exception:
+        raise RuntimeError(f"Complete tab raised: {app.exception[0].message}")
+
+    latencies, wall = timed(app.run, reruns)
+    peak = traced_peak(app.run)
+    return summarize("complete_rerun", size, latencies, wall, peak, cold_ms=cold * 1000)
+
+
+def bench_curate_save(size: int, repeat: int = 20) -> dict:
+    store = populated_store(os.path.join(_WORKDIR, f"curate-{size}.db"), size)
+    state = {"edits": 0}
+
+    def load_and_save():
+        # The Curate editor loads one page of rows, as the app does
+        rows = store.page(offset=(state["edits"] // 50 * 50) % size, limit=50)
+        row = rows[state["edits"] % len(rows)]
+        state["edits"] += 1
+        store.apply_changes(
+            updates={row["id"]: {"last_recommendation": f"Edited {state['edits']}"}},
+            versions={row["id"]: row["version"]},
+        )
+
+    latencies, wall = timed(load_and_save, repeat)
+    peak = traced_peak(load_and_save)
+    store.close()
+    return summarize("curate_save", size, latencies, wall, peak)
+
+
+def bench_search(size: int, repeat: int = 5) -> list:
+    from embeddings import EmbeddingIndex, HashingEmbedder
+    from name_index import NameIndex
+
+    store = populated_store(os.path.join(_WORKDIR, f"search-{size}.db"), size)
+    results = []
+
+    build_started = time.perf_counter()
+    name_index = NameIndex.from_store(store)
+    name_build = time.perf_counter() - build_started
+    build_started = time.perf_counter()
+    embedding_index = EmbeddingIndex.from_store(store, HashingEmbedder())
+    embedding_build = time.perf_counter() - build_started
+
+    cases = [
+        ("search:name_index", lambda: [name_index.search(query, limit=50) for query in SEARCH_QUERIES],
+         len(SEARCH_QUERIES), {"build_ms": name_build * 1000}),
+        ("search:store_like", lambda: [store.search(query, limit=50) for query in SEARCH_QUERIES],
+         len(SEARCH_QUERIES), {}),
+        ("search:who_would_like", lambda: embedding_index.query(IDEA_QUERIES, k=10),
+         len(IDEA_QUERIES), {"build_ms": embedding_build * 1000}),
+    ]
+    for name, fn, queries_per_call, extra in cases:
+        latencies, wall = timed(fn, repeat)
+        # Report per query rather than per batch of queries
+        per_query = [latency / queries_per_call for latency in latencies for _ in range(queries_per_call)]
+        results.append(summarize(name, size, per_query, wall, traced_peak(fn), **extra))
+    store.close()
+    return results
+
+
+def bench_frame_memory(size: int, repeat: int = 3) -> dict:
+    import pandas as pd
+
+    from contact_frame import contacts_frame
+    from contact_store import COLUMNS
+
+    store = populated_store(os.path.join(_WORKDIR, f"frame-{size}.db"), size)
+
+    def typed():
+        return contacts_frame(store.page(columns=COLUMNS, limit=size, decode_analysis=False))
+
+    def plain():
+        return pd.DataFrame(store.list(), columns=["id"] + COLUMNS)
+
+    def retained(build) -> int:
+        # Bytes still allocated while the frame is alive (dict and str cells included)
+        tracemalloc.start()
+        try:
+            frame = build()  # noqa: F841 - kept alive for the measurement
+            return tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+    latencies, wall = timed(typed, repeat)
+    # Arrow buffers live outside Python's allocator, so tracemalloc cannot see them:
+    # the typed frame is measured by its buffers, the object frame by what it retains
+    typed_bytes = int(typed().memory_usage(deep=True).sum())
+    plain_bytes = retained(plain)
+    peak = traced_peak(typed)
+    store.close()
+    return summarize(
+        "frame_memory", size, latencies, wall, peak,
+        typed_mb=typed_bytes / 1024 / 1024, object_mb=plain_bytes / 1024 / 1024,
+    )
+
+
+def bench_scheduler(size: int, stub: StubServer, calls: int = 20, background_workers: int = 8,
+                    requests_per_minute: float = 600) -> list:
+    import threading
+
+    from scheduler import BACKGROUND, INTERACTIVE, ScheduledClient, Scheduler
+
+    raw_client = get_client("stub", base_url=stub.url).client
+    results = []
+    for name, flood_priority in (("scheduler:idle", None), ("scheduler:under_load", BACKGROUND),
+                                 ("scheduler:no_priority", INTERACTIVE)):
+        scheduler = Scheduler(limits={}, default_rpm=requests_per_minute, default_tpm=None)
+        interactive = ScheduledClient(raw_client, scheduler)
+        stop = threading.Event()
+        flooded = []
+
+        def flood(worker, client):
+            n = 0
+            while not stop.is_set():
+                n += 1
+                client.chat.completions.create(
+                    model="gpt-4o-mini", messages=[{"role": "user", "content": f"bulk {worker} {n}"}]
+                )
+                flooded.append(n)
+
+        threads = []
+        if flood_priority is not None:
+            bulk = interactive.with_priority(flood_priority)
+            threads = [threading.Thread(target=flood, args=(worker, bulk), daemon=True)
+                       for worker in range(background_workers)]
+            for thread in threads:
+                thread.start()
+            # Wait until the flood has used up the bucket's burst and is being held back
+            while scheduler.queue_depth("gpt-4o-mini") < background_workers // 2:
+                time.sleep(0.01)
+        state = {"n": 0}
+
+        def ask():
+            state["n"] += 1
+            interactive.chat.completions.create(
+                model="gpt-4o-mini", messages=[{"role": "user", "content": f"interactive {state['n']}"}]
+            )
+
+        latencies, wall = timed(ask, calls)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        results.append(summarize(name, size, latencies, wall, 0, background_calls=len(flooded)))
+    return results
+
+
+# -----------------------------------------------------------------------------
+# Reporting
+# -----------------------------------------------------------------------------
+def format_table(results: list) -> str:
+    header = f"{'scenario':<24}{'size':>9}{'ops':>7}{'ops/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result['scenario']:<24}{result['size']:>9}{result['ops']:>7}"
+            f"{result['throughput_per_s']:>11.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{result['peak_mb']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Basil against synthetic data and a local OpenAI stub.")
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated store sizes, e.g. 1000,10000,100000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--notes", type=int, default=50, help="Voice notes per ingestion run")
+    parser.add_argument("--people-per-note", type=int, default=1, help="People described in each voice note")
+    parser.add_argument("--workers", type=int, default=4, help="JobQueue workers for ingestion")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub latency per API call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of stub calls answered with 429")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = []
+    with StubServer(latency_ms=args.latency_ms, failure_rate=args.failure_rate) as stub:
+        for size in sizes:
+            for scenario in scenarios:
+                print(f"running {scenario} at {size} contacts...", file=sys.stderr)
+                if scenario == "ingestion":
+                    results.append(bench_ingestion(
+                        size, stub, notes=args.notes, workers=args.workers, people_per_note=args.people_per_note
+                    ))
+                elif scenario == "complete_rerun":
+                    results.append(bench_complete_rerun(size, stub))
+                elif scenario == "curate_save":
+                    results.append(bench_curate_save(size))
+                elif scenario == "search":
+                    results.extend(bench_search(size))
+                elif scenario == "frame_memory":
+                    results.append(bench_frame_memory(size))
+                elif scenario == "scheduler":
+                    results.extend(bench_scheduler(size, stub))
+        stub_requests = dict(stub.state.requests)
+
+    print(format_table(results))
+    print(f"\nstub requests: {stub_requests}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "stub_requests": stub_requests, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Cold-start and rerun timings for the app.
+
+    python -m bench.startup
+    python -m bench.startup --contacts 10000 --reruns 20 --json startup.json
+
+Every measurement runs in a fresh interpreter, the way a new replica starts:
+
+    import  time to import each app module on top of streamlit itself, and the
+            heavy libraries that import pulled in
+    rerun   the app's first run (Capture), the first visit to each tab (which
+            imports it) and the median of later reruns on that tab
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "streamlit_app.py")
+APP_MODULES = ["metrics", "theme", "resources", "tabs", "tabs.capture", "tabs.curate", "tabs.complete"]
+HEAVY_LIBRARIES = ["openai", "pydantic", "pyarrow", "numpy", "pandas", "faster_whisper"]
+TABS = ["Capture", "Curate", "Complete"]
+
+
+def measure_import(module: str) -> dict:
+    import importlib
+
+    import streamlit  # noqa: F401 - always loaded before the app, so not part of its cost
+
+    already = {name for name in HEAVY_LIBRARIES if name in sys.modules}
+    started = time.perf_counter()
+    importlib.import_module(module)
+    elapsed = time.perf_counter() - started
+    pulled_in = [name for name in HEAVY_LIBRARIES if name in sys.modules and name not in already]
+    return {"module": module, "import_ms": elapsed * 1000, "pulled_in": pulled_in}
+
+
+def measure_reruns(contacts: int, reruns: int) -> list:
+    from bench.synthetic import populate_store
+    from contact_store import ContactStore
+    from streamlit.testing.v1 import AppTest
+
+    store = ContactStore(os.environ["FORGET_ME_NOT_DB"])
+    populate_store(store, contacts)
+    store.close()
+
+    app = AppTest.from_file(APP_PATH, default_timeout=600)
+    results = []
+    started = time.perf_counter()
+    app.run()
+    results.append({"step": "first run", "ms": (time.perf_counter() - started) * 1000})
+    for tab in TABS:
+        started = time.perf_counter()
+        app.sidebar.radio[1].set_value(tab).run()
+        first = time.perf_counter() - started
+        if app.exception:
+            raise RuntimeError(f"{tab} tab raised: {app.exception[0].message}")
+        latencies = []
+        for _ in range(reruns):
+            started = time.perf_counter()
+            app.run()
+            latencies.append(time.perf_counter() - started)
+        results.append({"step": f"{tab}: first visit", "ms": first * 1000})
+        results.append({"step": f"{tab}: rerun (median)", "ms": statistics.median(latencies) * 1000})
+    return results
+
+
+def run_child(args: list) -> object:
+    """
+    Run one measurement in a fresh interpreter with its own empty store.
+    """
+    workdir = tempfile.mkdtemp(prefix="basil-startup-")
+    env = dict(
+        os.environ,
+        FORGET_ME_NOT_DB=os.path.join(workdir, "app.db"),
+        FORGET_ME_NOT_CACHE_DIR=os.path.join(workdir, "cache"),
+    )
+    output = subprocess.run(
+        [sys.executable, "-m", "bench.startup", "--child", *args],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the app's import and rerun times.")
+    parser.add_argument("--contacts", type=int, default=1000, help="Contacts in the store for the rerun timings")
+    parser.add_argument("--reruns", type=int, default=10, help="Reruns per tab")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        kind, value = args.child[0], args.child[1:]
+        if kind == "import":
+            result = measure_import(value[0])
+        else:
+            result = measure_reruns(int(value[0]), int(value[1]))
+        print(json.dumps(result))
+        return
+
+    imports = []
+    for module in APP_MODULES:
+        print(f"importing {module}...", file=sys.stderr)
+        imports.append(run_child(["import", module]))
+    print("timing reruns...", file=sys.stderr)
+    reruns = run_child(["rerun", str(args.contacts), str(args.reruns)])
+
+    print(f"{'module':<16}{'import ms':>11}  pulled in")
+    for result in imports:
+        print(f"{result['module']:<16}{result['import_ms']:>11.1f}  {', '.join(result['pulled_in']) or '-'}")
+    print(f"\n{'step':<28}{'ms':>10}")
+    for result in reruns:
+        print(f"{result['step']:<28}{result['ms']:>10.1f}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "imports": imports, "reruns": reruns}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
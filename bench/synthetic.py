@@ -0,0 +1,97 @@
+"""
+Synthetic contacts and voice-note transcripts shaped like Basil's Brain.
+Everything is derived from a seed, so runs are repeatable.
+"""
+import random
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Diana", "Ethan", "Owen", "Priya", "Mateo", "Yuki", "Fatima",
+    "Liam", "Sofia", "Noah", "Amara", "Lucas", "Chloe", "Arjun", "Elena", "Kwame", "Hannah",
+    "Jonas", "Mei", "Omar", "Isla", "Tomas", "Zara", "Felix", "Nadia", "Ravi", "Greta",
+]
+LAST_NAMES = [
+    "Smith", "Garcia", "Okafor", "Tanaka", "Müller", "Rossi", "Nguyen", "Patel", "Kowalski", "Silva",
+    "Johansson", "O'Neil", "Dubois", "Haddad", "Kim", "Novak", "Mensah", "Fischer", "Costa", "Ali",
+]
+INTERESTS = [
+    "loves painting", "big football fan", "jazz musician", "rock climbing", "dog lover",
+    "coffee connoisseur", "tech startup founder", "into photography", "marathon runner",
+    "amateur chef", "opera season ticket holder", "plays chess online", "wine collector",
+    "building companies to unicorn status", "Arsenal football club", "hiking the Alps",
+    "reads sci-fi", "volunteers at the food bank", "learning Japanese", "board games",
+]
+RECOMMENDATIONS = [
+    "Catch up over coffee next week", "Try the new sushi restaurant in town",
+    "Book recommendation: 'Atomic Habits'", "Invite to weekend beach trip",
+    "Suggest a local hackathon event", "The Great Gatsby", "Send the article on climbing gyms",
+    "Introduce to the design team", "Share the jazz festival lineup", "Lunch after the conference",
+]
+
+
+def generate_contacts(n: int, seed: int = 0, duplicate_rate: float = 0.0) -> list:
+    """
+    `n` contact records in the store's shape. With `duplicate_rate`, that share of
+    rows re-uses an earlier person's name so de-duplication has something to find.
+    """
+    rng = random.Random(seed)
+    contacts = []
+    for i in range(n):
+        if contacts and rng.random() < duplicate_rate:
+            name = rng.choice(contacts)["Name"]
+        else:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            if rng.random() < 0.5:
+                name += f" {i}"
+        interests = ", ".join(rng.sample(INTERESTS, rng.randint(1, 3)))
+        recommendation = rng.choice(RECOMMENDATIONS)
+        contacts.append({
+            "Name": name,
+            "last_recommendation": recommendation,
+            "other_interesting_items": interests,
+            "analysis_json": {
+                "Name": name,
+                "last_recommendation": recommendation,
+                "other_interesting_items": interests,
+            },
+        })
+    return contacts
+
+
+def transcript_for(contact: dict) -> str:
+    return (
+        f"Just met {contact['Name']} at the meetup. "
+        f"They are {contact['other_interesting_items']}. "
+        f"Next time: {contact['last_recommendation']}."
+    )
+
+
+def contact_for_note(seed: int, i: int, person: int = 0) -> dict:
+    """
+    The synthetic person number `person` "recorded" in note `i` of generate_audio_notes(seed=seed).
+    """
+    return generate_contacts(1, seed=(seed * 1_000_003 + i) * 97 + person)[0]
+
+
+def people_for_note(seed: int, i: int, count: int = 1) -> list:
+    return [contact_for_note(seed, i, person) for person in range(count)]
+
+
+def generate_audio_notes(n: int, seed: int = 0, size_bytes: int = 32_000, people_per_note: int = 1) -> list:
+    """
+    (filename, bytes) pairs standing in for recordings. The bytes are unique per
+    note (so content-addressed caches miss) and the stub transcribes them back to
+    the matching synthetic contacts, `people_per_note` of them per note.
+    """
+    rng = random.Random(seed)
+    notes = []
+    for i in range(n):
+        header = f"BASIL-NOTE:{seed}:{i}:{people_per_note}:".encode("utf-8")
+        notes.append((f"note_{i:05d}.wav", header + rng.randbytes(max(0, size_bytes - len(header)))))
+    return notes
+
+
+def populate_store(store, n: int, seed: int = 0, batch_size: int = 5_000) -> int:
+    contacts = generate_contacts(n, seed)
+    for start in range(0, n, batch_size):
+        store.add_many(contacts[start:start + batch_size])
+    return n
@@ -0,0 +1,290 @@
+"""
+Bulk import of recorded voice notes.
+
+Takes a folder or zip of wav/mp3/m4a files, transcribes them with bounded
+concurrency, extracts profiles for several transcripts per chat call and
+writes every row in one commit. Its API calls are queued as background work
+(see scheduler.py), behind anything a user is waiting for.
+
+    python bulk_import.py recordings/ --concurrency 8
+    python bulk_import.py conference.zip --db forget_me_not.db
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel
+
+import history
+import metrics
+from ai_cache import prompt_key
+from audio_prep import prepare_audio
+from pipeline import (
+    EMPTY_EXTRACTION,
+    EXTRACTION_MODEL,
+    PeopleFormat,
+    extract_people,
+    extraction_from_content,
+    no_stage,
+    parse_people,
+    row_from_extraction,
+    transcribe_audio,
+)
+from scheduler import background
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a")
+
+BATCH_EXTRACTION_SYSTEM_PROMPT = "You are a helpful assistant that extracts information from text."
+BATCH_EXTRACTION_PROMPT = """Each numbered text below describes one or several people.
+For every person in every text, extract:
+- name
+- last_recommendation
+- other_interesting_items
+
+Return exactly one entry in "texts" per numbered text, in the same order, each
+listing the people that text describes. Use an empty string for anything a text does not say.
+
+{numbered_transcripts}
+"""
+
+
+# -----------------------------------------------------------------------------
+# Input discovery
+# -----------------------------------------------------------------------------
+def _is_audio(filename: str) -> bool:
+    return filename.lower().endswith(AUDIO_EXTENSIONS)
+
+
+def _iter_zip(name: str, data: bytes):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and _is_audio(info.filename):
+                yield f"{name}/{info.filename}", archive.read(info)
+
+
+def expand_uploads(items):
+    """
+    (filename, bytes) pairs -> audio (filename, bytes) pairs, expanding zip archives.
+    """
+    for name, data in items:
+        if name.lower().endswith(".zip"):
+            yield from _iter_zip(name, data)
+        elif _is_audio(name):
+            yield name, data
+
+
+def iter_audio_files(path: str):
+    """
+    Yield (filename, bytes) for every audio file in a directory tree or zip archive.
+    """
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for filename in sorted(files):
+                full_path = os.path.join(root, filename)
+                if _is_audio(filename) or filename.lower().endswith(".zip"):
+                    with open(full_path, "rb") as f:
+                        yield from expand_uploads([(os.path.relpath(full_path, path), f.read())])
+    else:
+        with open(path, "rb") as f:
+            yield from expand_uploads([(os.path.basename(path), f.read())])
+
+
+# -----------------------------------------------------------------------------
+# Transcription and batched extraction
+# -----------------------------------------------------------------------------
+def transcribe_all(client, files: list, concurrency: int = 4, cache=None) -> list:
+    """
+    Preprocess and transcribe (filename, bytes) pairs with at most `concurrency` requests in flight.
+    Returns (filename, transcript or None, error or None) in input order.
+    """
+    def transcribe(item):
+        filename, audio_bytes = item
+        try:
+            prepared = prepare_audio(audio_bytes, os.path.basename(filename))
+            transcript = transcribe_audio(client, prepared.data, filename=prepared.filename, cache=cache)
+            return filename, transcript, None
+        except Exception as e:
+            return filename, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(transcribe, files))
+
+
+class PeopleBatchFormat(BaseModel):
+    texts: list[PeopleFormat]
+
+
+def extract_batch(client, transcripts: list, cache=None) -> list:
+    """
+    Extract the people in each transcript, sending the uncached ones in a single
+    structured-output call. Returns one list of extraction dicts (or None) per
+    transcript. Falls back to one call per transcript if the batched answer
+    does not line up.
+    """
+    prompt = BATCH_EXTRACTION_SYSTEM_PROMPT + BATCH_EXTRACTION_PROMPT
+    results = [None] * len(transcripts)
+    keys = [prompt_key(transcript, prompt, EXTRACTION_MODEL) for transcript in transcripts]
+    if cache is not None:
+        for i, key in enumerate(keys):
+            results[i] = parse_people(cache.extractions.get(key))
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    numbered = "\n\n".join(f"Text {n + 1}: {transcripts[i]}" for n, i in enumerate(pending))
+    with metrics.span("extract_batch", model=EXTRACTION_MODEL) as attrs:
+        attrs["transcripts"] = len(pending)
+        with metrics.span("openai_request", endpoint="chat.completions", model=EXTRACTION_MODEL):
+            response = client.chat.completions.parse(
+                model=EXTRACTION_MODEL,
+                messages=[
+                    {"role": "system", "content": BATCH_EXTRACTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": BATCH_EXTRACTION_PROMPT.format(numbered_transcripts=numbered)},
+                ],
+                response_format=PeopleBatchFormat
+            )
+        attrs.update(metrics.record_usage(EXTRACTION_MODEL, response.usage))
+    parsed = response.choices[0].message.parsed
+    texts = parsed.texts if parsed is not None and len(parsed.texts) == len(pending) else None
+    for n, i in enumerate(pending):
+        if texts is None:
+            results[i] = extract_people(client, transcripts[i], cache=cache)
+            continue
+        results[i] = [extraction_from_content(person) for person in texts[n].people]
+        if cache is not None:
+            cache.extractions.set(keys[i], texts[n].model_dump_json())
+    return results
+
+
+def extract_files(client, batch: list, cache=None) -> list:
+    """
+    extract_batch for (filename, transcript) pairs that survives a failed call: the
+    batch is retried one transcript at a time, and files that still fail get an error.
+    Returns (filename, transcript, people or None, error or None) per pair.
+    """
+    transcripts = [transcript for _, transcript in batch]
+    try:
+        extracted = extract_batch(client, transcripts, cache=cache)
+        return [(filename, transcript, people, None) for (filename, transcript), people in zip(batch, extracted)]
+    except Exception as e:
+        metrics.inc("extract_batch_failures_total", error=type(e).__name__)
+    results = []
+    for filename, transcript in batch:
+        try:
+            results.append((filename, transcript, extract_people(client, transcript, cache=cache), None))
+        except Exception as e:
+            results.append((filename, transcript, None, str(e)))
+    return results
+
+
+# -----------------------------------------------------------------------------
+# Bulk import
+# -----------------------------------------------------------------------------
+def bulk_import(store, client, files, concurrency: int = 4, extraction_batch_size: int = 8,
+                cache=None, resolver=None, stage=no_stage) -> dict:
+    """
+    Transcribe and extract every file, then write all the rows at once.
+    With a dedupe.Resolver, rows matching existing contacts (or each other) are merged;
+    notes nothing could be extracted from still get their own blank row.
+    Returns a summary with counts and per-file errors.
+    """
+    files = list(files)
+    client = background(client)
+    with stage("transcribing"):
+        transcribed = transcribe_all(client, files, concurrency=concurrency, cache=cache)
+
+    errors = {filename: error for filename, _, error in transcribed if error}
+    ok = [(filename, transcript) for filename, transcript, error in transcribed if not error]
+
+    rows, transcripts, parsed = [], [], []
+    with stage("analyzing"):
+        batches = [ok[i:i + extraction_batch_size] for i in range(0, len(ok), extraction_batch_size)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            extracted = pool.map(lambda batch: extract_files(client, batch, cache=cache), batches)
+            for results in extracted:
+                for filename, transcript, people, error in results:
+                    if error:
+                        errors[filename] = error
+                        continue
+                    if not people:
+                        metrics.inc("extraction_parse_failures_total")
+                    for person in people or [EMPTY_EXTRACTION]:
+                        analysis_json = dict(person, source_file=filename)
+                        rows.append(row_from_extraction(analysis_json))
+                        transcripts.append((transcript, analysis_json))
+                        parsed.append(bool(people))
+
+    merged = 0
+    with metrics.span("store_write", mode="bulk") as attrs:
+        if resolver is not None:
+            # Blank rows for notes nothing was extracted from bypass the resolver, as in
+            # pipeline.py: they would otherwise all merge into one another
+            resolved_ids, merged = resolver.upsert_many([row for row, ok in zip(rows, parsed) if ok])
+            blank_ids = store.add_many([row for row, ok in zip(rows, parsed) if not ok])
+            resolved_ids, blank_ids = iter(resolved_ids), iter(blank_ids)
+            contact_ids = [next(resolved_ids) if ok else next(blank_ids) for ok in parsed]
+            written = len(set(contact_ids))
+        else:
+            contact_ids = store.add_many(rows)
+            written = len(contact_ids)
+        attrs["rows"] = written
+    history.record_captures(store, [
+        (contact_id, transcript, extraction)
+        for contact_id, (transcript, extraction) in zip(contact_ids, transcripts)
+    ])
+    return {"files": len(files), "written": written, "merged": merged, "errors": errors}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import a folder or zip of voice notes into Basil's Brain.")
+    parser.add_argument("path", help="Directory or .zip archive of wav/mp3/m4a files")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="Defaults to $OPENAI_API_KEY")
+    parser.add_argument("--db", default=None, help="SQLite contact store (defaults to the app's store)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Transcriptions in flight at once")
+    parser.add_argument("--batch-size", type=int, default=8, help="Transcripts per extraction call")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the transcript/extraction cache")
+    parser.add_argument("--no-dedupe", action="store_true", help="Append every note instead of merging duplicates")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("an OpenAI API key is required (--api-key or $OPENAI_API_KEY)")
+
+    from ai_cache import PipelineCache
+    from clients import get_client
+    from contact_store import ContactStore
+    from dedupe import Resolver
+
+    store = ContactStore(args.db) if args.db else ContactStore()
+    files = list(iter_audio_files(args.path))
+    print(f"Found {len(files)} audio files in {args.path}")
+    started = time.perf_counter()
+    summary = bulk_import(
+        store,
+        get_client(args.api_key),
+        files,
+        concurrency=args.concurrency,
+        extraction_batch_size=args.batch_size,
+        cache=None if args.no_cache else PipelineCache(),
+        resolver=None if args.no_dedupe else Resolver.from_store(store),
+        stage=_print_stage,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"Imported {summary['files'] - len(summary['errors'])} of {summary['files']} notes in {elapsed:.1f}s "
+          f"({summary['merged']} merged into existing profiles)")
+    for filename, error in summary["errors"].items():
+        print(f"  failed: {filename}: {error}", file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+def _print_stage(name: str):
+    print(f"{name}...")
+    return no_stage(name)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
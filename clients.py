@@ -0,0 +1,84 @@
+"""
+Process-wide registry of OpenAI clients.
+
+One client per API key, each with its own pooled HTTP connection pool, so
+keep-alive connections and TLS sessions survive Streamlit reruns. Every client
+is wrapped in a scheduler.ScheduledClient, which rate-limits, prioritizes and
+retries its calls (the SDK's own retries are off). Timeouts and pool limits
+come from the environment:
+
+    OPENAI_TIMEOUT            request timeout in seconds (default 60)
+    OPENAI_CONNECT_TIMEOUT    connect timeout in seconds (default 10)
+    OPENAI_MAX_CONNECTIONS    concurrent requests per key (default 16)
+    OPENAI_MAX_KEEPALIVE      idle connections kept open per key (default 8)
+"""
+import hashlib
+import os
+import threading
+
+import metrics
+from scheduler import RETRYABLE_STATUS_CODES, ScheduledClient
+
+TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "60"))
+CONNECT_TIMEOUT = float(os.environ.get("OPENAI_CONNECT_TIMEOUT", "10"))
+MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "16"))
+MAX_KEEPALIVE = int(os.environ.get("OPENAI_MAX_KEEPALIVE", "8"))
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _registry_key(api_key: str, base_url: str = None) -> str:
+    # Keep raw keys out of the registry's dict keys
+    return hashlib.sha256(f"{base_url or ''}\0{api_key}".encode("utf-8")).hexdigest()
+
+
+def _count_response(response):
+    # Every HTTP response, including the ones the SDK retries internally, so
+    # rate limiting shows up in the metrics even when the call succeeds.
+    metrics.inc("openai_http_responses_total", status=response.status_code, path=response.request.url.path)
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        metrics.inc("openai_retryable_responses_total", status=response.status_code)
+
+
+def _build_client(api_key: str, base_url: str = None):
+    import httpx
+    from openai import DefaultHttpxClient, OpenAI, Timeout
+
+    # DefaultHttpxClient keeps the SDK's own transport defaults. While all
+    # MAX_CONNECTIONS are busy, further requests wait for a free connection
+    # (up to the pool timeout) instead of opening new ones.
+    http_client = DefaultHttpxClient(
+        timeout=Timeout(TIMEOUT, connect=CONNECT_TIMEOUT, pool=TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+        ),
+        event_hooks={"response": [_count_response]},
+    )
+    client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+    # Rate limits, 429 pauses and coalescing are per account, never shared across keys
+    return ScheduledClient(client, account=_registry_key(api_key, base_url))
+
+
+def get_client(api_key: str, base_url: str = None):
+    """
+    Shared OpenAI client for this API key (and optional base URL), created on first use.
+    """
+    key = _registry_key(api_key, base_url)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _build_client(api_key, base_url)
+            _clients[key] = client
+        return client
+
+
+def close_all():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
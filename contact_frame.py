@@ -0,0 +1,105 @@
+"""
+Typed, columnar DataFrames of contacts for display and editing.
+
+Store rows are plain dicts with a Python str per cell and a dict per
+analysis_json; a DataFrame built straight from them keeps every cell as a
+Python object. Here each column gets a compact dtype instead:
+
+    id, version         int64 / int32
+    updated_at          float64
+    Name, interests     Arrow-backed strings (one contiguous buffer per column)
+    last_recommendation categorical in read-only frames (recommendations repeat a lot)
+    analysis_json       Arrow binary: the JSON text, zlib-compressed when that is smaller,
+                        decoded only when a row is opened (see analysis_at)
+
+memory_report(frame) lists the bytes each column takes.
+"""
+import json
+import zlib
+
+import pandas as pd
+import pyarrow as pa
+
+from contact_store import COLUMNS
+
+STRING_DTYPE = pd.ArrowDtype(pa.string())
+BINARY_DTYPE = pd.ArrowDtype(pa.binary())
+
+# Packed analysis_json: one marker byte, then the JSON text as is or zlib-compressed.
+# The preset dictionary holds the keys every extraction repeats, so even short
+# documents compress well.
+_RAW = b"j"
+_ZLIB = b"z"
+_ZDICT = b'{"Name": "", "last_recommendation": "", "other_interesting_items": "", "people": [], '
+
+
+def pack_analysis(value) -> bytes:
+    """
+    Compact bytes for an analysis_json value (a dict, or the JSON text the store keeps).
+    """
+    text = value if isinstance(value, str) else json.dumps(value if isinstance(value, dict) else {})
+    data = text.encode("utf-8")
+    compressor = zlib.compressobj(6, zdict=_ZDICT)
+    compressed = compressor.compress(data) + compressor.flush()
+    return _ZLIB + compressed if len(compressed) < len(data) else _RAW + data
+
+
+def unpack_analysis(packed) -> dict:
+    if not packed:
+        return {}
+    if packed[:1] == _ZLIB:
+        decompressor = zlib.decompressobj(zdict=_ZDICT)
+        data = decompressor.decompress(packed[1:]) + decompressor.flush()
+    else:
+        data = packed[1:]
+    try:
+        value = json.loads(data)
+    except json.JSONDecodeError:
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def contacts_frame(rows: list, with_version: bool = False, columns: list = None,
+                   editable: bool = False) -> pd.DataFrame:
+    """
+    Build a typed DataFrame from store rows, keeping the row id (and optionally
+    the version stamp) for writes back to the store. `editable` frames keep
+    last_recommendation as plain strings so the data editor accepts any text.
+    """
+    columns = COLUMNS if columns is None else columns
+    data = {"id": pd.array([row["id"] for row in rows], dtype="int64")}
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        if column == "analysis_json":
+            data[column] = pd.array([pack_analysis(value) for value in values], dtype=BINARY_DTYPE)
+        elif column == "last_recommendation" and not editable:
+            data[column] = pd.Categorical(values)
+        else:
+            data[column] = pd.array(values, dtype=STRING_DTYPE)
+    if with_version:
+        data["version"] = pd.array([row["version"] for row in rows], dtype="int32")
+    return pd.DataFrame(data)
+
+
+def analysis_at(frame: pd.DataFrame, contact_id: int) -> dict:
+    """
+    Decode the analysis_json of one contact in the frame ({} if it is not there).
+    """
+    if "analysis_json" not in frame.columns:
+        return {}
+    matches = frame.loc[frame["id"] == contact_id, "analysis_json"]
+    return unpack_analysis(matches.iloc[0]) if len(matches) else {}
+
+
+def memory_report(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bytes per column (including the strings and buffers behind them) and per row.
+    """
+    usage = frame.memory_usage(deep=True, index=False)
+    rows = max(1, len(frame))
+    return pd.DataFrame({
+        "column": usage.index,
+        "dtype": [str(frame[column].dtype) for column in usage.index],
+        "bytes": usage.values,
+        "bytes per row": (usage.values / rows).round(1),
+    })
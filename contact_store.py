@@ -0,0 +1,739 @@
+"""
+SQLite-backed contact store for Basil.
+
+Every browser session (and every worker thread) reads and writes contacts
+through one ContactStore instead of keeping its own copy of the DataFrame.
+Rows are handed out as plain dicts using the same column names the app has
+always used ("Name", "last_recommendation", ...), plus the row "id" and
+"updated_at" stamp.
+
+The database runs in WAL mode, so several processes (replicas, CLI imports)
+can share one file: each thread reads through its own connection without
+waiting for writers, and writes queue on SQLite's write lock. Every write also
+appends to a change log in the same transaction; changes_since() turns it into
+a feed views can refresh from, and follow() passes other processes' writes on
+to this process's listeners.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_DB_PATH = os.environ.get(
+    "FORGET_ME_NOT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "forget_me_not.db"),
+)
+
+# Column names used throughout the app -> column names in SQLite
+COLUMNS = ["Name", "last_recommendation", "other_interesting_items", "analysis_json"]
+_DB_COLUMNS = {
+    "Name": "name",
+    "last_recommendation": "last_recommendation",
+    "other_interesting_items": "other_interesting_items",
+    "analysis_json": "analysis_json",
+}
+
+# Seconds a connection waits for another process's write lock before giving up
+BUSY_TIMEOUT = float(os.environ.get("FORGET_ME_NOT_DB_BUSY_TIMEOUT", "10"))
+# Idle read connections kept open for reuse; busier moments open (and then close) extra ones
+READER_POOL_SIZE = int(os.environ.get("FORGET_ME_NOT_DB_READERS", "8"))
+# Change-log entries older than this are pruned by follow()
+CHANGE_LOG_SECONDS = 24 * 3600
+
+logger = logging.getLogger(__name__)
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL DEFAULT '',
+    last_recommendation TEXT NOT NULL DEFAULT '',
+    other_interesting_items TEXT NOT NULL DEFAULT '',
+    analysis_json TEXT NOT NULL DEFAULT '{}',
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_contacts_name ON contacts (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_contacts_updated_at ON contacts (updated_at);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    contact_id INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    writer TEXT NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_changes_at ON changes (at);
+CREATE TABLE IF NOT EXISTS interactions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    contact_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_contact ON interactions (contact_id, seq);
+CREATE TABLE IF NOT EXISTS profiles (
+    contact_id INTEGER PRIMARY KEY,
+    through_seq INTEGER NOT NULL,
+    snapshot TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS suggestions (
+    contact_id INTEGER PRIMARY KEY,
+    interests_hash TEXT NOT NULL,
+    prompt_version INTEGER NOT NULL,
+    suggestions TEXT NOT NULL DEFAULT '[]',
+    generated_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release; older databases get them on open
+_MIGRATIONS = {
+    "version": "INTEGER NOT NULL DEFAULT 1",
+}
+
+
+class StaleRowError(Exception):
+    """
+    Raised when a write carries a row version that is no longer current,
+    i.e. someone else changed or deleted the row since it was read.
+    """
+
+    def __init__(self, ids: list):
+        self.ids = sorted(ids)
+        super().__init__(f"Contacts changed by someone else in the meantime: {self.ids}")
+
+
+def _to_db_values(record: dict) -> dict:
+    """
+    Map an app-level record onto the SQLite columns it touches.
+    Only keys that are present in the record are returned, so it also works for partial updates.
+    """
+    values = {}
+    for column, db_column in _DB_COLUMNS.items():
+        if column not in record:
+            continue
+        value = record[column]
+        if column == "analysis_json":
+            value = json.dumps(value if isinstance(value, dict) else {})
+        else:
+            value = "" if value is None else str(value)
+        values[db_column] = value
+    return values
+
+
+# Columns page() can sort by -> ORDER BY expression
+_SORT_EXPRESSIONS = {
+    "id": "id",
+    "Name": "name COLLATE NOCASE",
+    "last_recommendation": "last_recommendation COLLATE NOCASE",
+    "other_interesting_items": "other_interesting_items COLLATE NOCASE",
+    "updated_at": "updated_at",
+}
+_FILTER_SQL = (
+    "name LIKE ? ESCAPE '\\' OR other_interesting_items LIKE ? ESCAPE '\\' "
+    "OR last_recommendation LIKE ? ESCAPE '\\'"
+)
+
+
+def _like_pattern(text: str) -> str:
+    """
+    LIKE pattern matching `text` anywhere: % and _ typed by the user are literal (ESCAPE '\\').
+    """
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _from_db_row(row: sqlite3.Row, decode_analysis: bool = True) -> dict:
+    """
+    Works on projected rows too: only the columns that were selected end up in the record.
+    With decode_analysis=False, analysis_json is left as the stored JSON text.
+    """
+    selected = set(row.keys())
+    record = {"id": row["id"]}
+    for column, db_column in _DB_COLUMNS.items():
+        if db_column in selected:
+            record[column] = row[db_column]
+    if "analysis_json" in record and decode_analysis:
+        try:
+            record["analysis_json"] = json.loads(record["analysis_json"] or "{}")
+        except json.JSONDecodeError:
+            record["analysis_json"] = {}
+    record["updated_at"] = row["updated_at"]
+    record["version"] = row["version"]
+    return record
+
+
+class ContactStore:
+    """
+    Small repository API over the contacts table: get/add/update/delete/list/search.
+    A single instance is safe to share between threads.
+
+    Derived indexes register with subscribe(callback); after every committed write
+    the store calls callback(op, ids) with op UPSERT or DELETE and the affected row ids.
+    With follow() running, writes made by other processes are reported the same way.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        # Tags this instance's entries in the change log, so follow() skips our own writes
+        self.writer_id = uuid.uuid4().hex
+        self._lock = threading.RLock()
+        # An in-memory database exists only on its one connection
+        self._in_memory = path == ":memory:" or path.startswith("file::memory:")
+        # Writes: one connection, BEGIN IMMEDIATE so a transaction takes the write lock up front
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT, isolation_level="IMMEDIATE")
+        self._conn.row_factory = sqlite3.Row
+        self._idle_readers = []
+        self._closed = False
+        self._listeners = []
+        self._follower = None
+        self._stop_following = threading.Event()
+        with self._lock:
+            if not self._in_memory:
+                self._conn.execute("PRAGMA journal_mode = WAL")
+                self._conn.execute("PRAGMA synchronous = NORMAL")
+            with self._conn:
+                self._conn.executescript(_SCHEMA)
+                self._migrate()
+        self._seen_seq = self.last_change()
+
+    def _migrate(self):
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(contacts)")}
+        for column, definition in _MIGRATIONS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE contacts ADD COLUMN {column} {definition}")
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, op: str, ids: list):
+        if not ids:
+            return
+        for callback in list(self._listeners):
+            try:
+                callback(op, ids)
+            except Exception:
+                logger.exception("Contact store listener failed")
+
+    def close(self):
+        self._stop_following.set()
+        if self._follower is not None:
+            self._follower.join()
+        with self._lock:
+            self._closed = True
+            for reader in self._idle_readers:
+                reader.close()
+            self._idle_readers.clear()
+            self._conn.close()
+
+    def _open_reader(self) -> sqlite3.Connection:
+        reader = sqlite3.connect(self.path, check_same_thread=False, timeout=BUSY_TIMEOUT, isolation_level=None)
+        reader.row_factory = sqlite3.Row
+        reader.execute("PRAGMA query_only = 1")
+        return reader
+
+    def _read(self, sql: str, params: tuple = ()) -> list:
+        """
+        Run a query on a pooled read connection (WAL lets it read while another
+        connection writes). Connections are borrowed per query rather than held per
+        thread: Streamlit runs every rerun and fragment tick on a fresh thread.
+        """
+        if self._in_memory:
+            with self._lock:
+                return self._conn.execute(sql, params).fetchall()
+        with self._lock:
+            reader = self._idle_readers.pop() if self._idle_readers else None
+        if reader is None:
+            reader = self._open_reader()
+        try:
+            return reader.execute(sql, params).fetchall()
+        finally:
+            with self._lock:
+                keep = not self._closed and len(self._idle_readers) < READER_POOL_SIZE
+                if keep:
+                    self._idle_readers.append(reader)
+            if not keep:
+                reader.close()
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+    def get(self, contact_id: int):
+        rows = self._read("SELECT * FROM contacts WHERE id = ?", (contact_id,))
+        return _from_db_row(rows[0]) if rows else None
+
+    def list(self, limit: int = None, offset: int = 0) -> list:
+        sql = "SELECT * FROM contacts ORDER BY id"
+        params = ()
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = (limit, offset)
+        return [_from_db_row(row) for row in self._read(sql, params)]
+
+    def get_many(self, ids: list, decode_analysis: bool = True) -> list:
+        ids = list(ids)
+        rows = []
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows.extend(self._read(f"SELECT * FROM contacts WHERE id IN ({placeholders}) ORDER BY id", tuple(chunk)))
+        return [_from_db_row(row, decode_analysis) for row in rows]
+
+    def search(self, text: str, limit: int = 50) -> list:
+        """
+        Case-insensitive substring search over names and interests.
+        """
+        pattern = _like_pattern(text)
+        rows = self._read(
+            "SELECT * FROM contacts "
+            "WHERE name LIKE ? ESCAPE '\\' OR other_interesting_items LIKE ? ESCAPE '\\' "
+            "ORDER BY name COLLATE NOCASE LIMIT ?",
+            (pattern, pattern, limit),
+        )
+        return [_from_db_row(row) for row in rows]
+
+    def names(self, ids: list = None) -> list:
+        """
+        (id, Name) pairs for every contact (or just `ids`), without loading the heavier columns.
+        """
+        if ids is not None:
+            return [(record["id"], record["Name"]) for record in self.get_many(ids)]
+        rows = self._read("SELECT id, name FROM contacts ORDER BY name COLLATE NOCASE, id")
+        return [(row["id"], row["name"]) for row in rows]
+
+    def count(self, filter_text: str = None) -> int:
+        """
+        Number of contacts, or of those matching `filter_text` (as in page()).
+        """
+        sql, params = "SELECT COUNT(*) FROM contacts", ()
+        if filter_text:
+            sql += f" WHERE {_FILTER_SQL}"
+            params = (_like_pattern(filter_text),) * 3
+        return self._read(sql, params)[0][0]
+
+    def page(self, columns: list = None, sort_by: str = "id", descending: bool = False,
+             filter_text: str = None, limit: int = 50, offset: int = 0, decode_analysis: bool = True,
+             after_id: int = None) -> list:
+        """
+        One page of contacts for display: only `columns` (default: all but analysis_json)
+        plus id, updated_at and version are read, filtered by a case-insensitive substring
+        of the name, interests or last recommendation, sorted by `sort_by` with id as tie-break.
+        decode_analysis=False hands analysis_json back as JSON text, for callers that
+        keep it serialized (see contact_frame.py). `after_id` keeps only rows with a higher id.
+        """
+        if sort_by not in _SORT_EXPRESSIONS:
+            raise ValueError(f"Cannot sort contacts by {sort_by!r}")
+        columns = [column for column in COLUMNS if column != "analysis_json"] if columns is None else columns
+        selected = ["id", "updated_at", "version"] + [_DB_COLUMNS[column] for column in columns]
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT {', '.join(selected)} FROM contacts"
+        conditions, params = [], ()
+        if filter_text:
+            conditions.append(f"({_FILTER_SQL})")
+            params = (_like_pattern(filter_text),) * 3
+        if after_id is not None:
+            conditions.append("id > ?")
+            params += (after_id,)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {_SORT_EXPRESSIONS[sort_by]} {direction}, id {direction} LIMIT ? OFFSET ?"
+        rows = self._read(sql, params + (limit, offset))
+        return [_from_db_row(row, decode_analysis) for row in rows]
+
+    def scan(self, columns: list, batch_size: int = 1000):
+        """
+        Every contact, `batch_size` rows at a time in id order, reading only `columns`
+        (as in page()). Pages continue from the last id seen, so rows deleted or added
+        meanwhile never make the scan skip another row.
+        """
+        after_id = None
+        while True:
+            rows = self.page(columns=columns, limit=batch_size, after_id=after_id)
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1]["id"]
+
+    # -------------------------------------------------------------------------
+    # Stored suggestions (precomputed next steps, one entry per contact)
+    # -------------------------------------------------------------------------
+    def get_suggestions(self, contact_id: int):
+        """
+        {"interests_hash", "prompt_version", "suggestions", "generated_at"} for a contact, or None.
+        """
+        rows = self._read("SELECT * FROM suggestions WHERE contact_id = ?", (contact_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        return {
+            "interests_hash": row["interests_hash"],
+            "prompt_version": row["prompt_version"],
+            "suggestions": json.loads(row["suggestions"]),
+            "generated_at": row["generated_at"],
+        }
+
+    def suggestions_due(self, prompt_version: int, limit: int = None) -> list:
+        """
+        Contacts with no stored suggestions, suggestions from another prompt
+        version, or a profile changed since their suggestions were generated.
+        """
+        sql = (
+            "SELECT c.* FROM contacts c LEFT JOIN suggestions s ON s.contact_id = c.id "
+            "WHERE s.contact_id IS NULL OR s.prompt_version != ? OR c.updated_at > s.generated_at "
+            "ORDER BY c.id"
+        )
+        params = (prompt_version,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        rows = self._read(sql, params)
+        return [_from_db_row(row) for row in rows]
+
+    def set_suggestions(self, entries: list):
+        """
+        Store (contact id, interests hash, prompt version, suggestions, generated at)
+        entries in one transaction, replacing earlier ones. Entries for contacts
+        deleted in the meantime are dropped.
+        """
+        rows = [
+            (contact_id, interests_hash, prompt_version, json.dumps(list(suggestions)), generated_at)
+            for contact_id, interests_hash, prompt_version, suggestions, generated_at in entries
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO suggestions "
+                "(contact_id, interests_hash, prompt_version, suggestions, generated_at) "
+                "SELECT ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM contacts WHERE id = ?)",
+                [row + (row[0],) for row in rows],
+            )
+
+    # -------------------------------------------------------------------------
+    # Interaction history (append-only log, plus one compacted profile per contact)
+    # -------------------------------------------------------------------------
+    def append_interactions(self, entries: list) -> int:
+        """
+        Append (contact id, kind, payload dict, at) entries in one transaction.
+        Entries for contacts that no longer exist are dropped. Returns how many were written.
+        """
+        rows = [
+            (contact_id, kind, json.dumps(payload), at, contact_id)
+            for contact_id, kind, payload, at in entries
+        ]
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "INSERT INTO interactions (contact_id, kind, payload, at) "
+                "SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM contacts WHERE id = ?)",
+                rows,
+            )
+        return cursor.rowcount
+
+    def interactions(self, contact_id: int, limit: int = 10, after_seq: int = None) -> list:
+        """
+        A contact's latest `limit` interactions, newest first; or, with `after_seq`,
+        every interaction after that one, oldest first (for compaction).
+        Each is {"seq", "contact_id", "kind", "payload", "at"}.
+        """
+        if after_seq is None:
+            rows = self._read(
+                "SELECT * FROM interactions WHERE contact_id = ? ORDER BY seq DESC LIMIT ?", (contact_id, limit)
+            )
+        else:
+            rows = self._read(
+                "SELECT * FROM interactions WHERE contact_id = ? AND seq > ? ORDER BY seq", (contact_id, after_seq)
+            )
+        return [
+            {
+                "seq": row["seq"],
+                "contact_id": row["contact_id"],
+                "kind": row["kind"],
+                "payload": json.loads(row["payload"]),
+                "at": row["at"],
+            }
+            for row in rows
+        ]
+
+    def get_profile(self, contact_id: int):
+        """
+        (snapshot dict, seq of the last interaction folded into it) for a contact, or None.
+        """
+        rows = self._read("SELECT through_seq, snapshot FROM profiles WHERE contact_id = ?", (contact_id,))
+        return (json.loads(rows[0]["snapshot"]), rows[0]["through_seq"]) if rows else None
+
+    def set_profiles(self, entries: list):
+        """
+        Store (contact id, snapshot dict, through seq) entries. A snapshot only replaces
+        one that is further behind, so concurrent compactions cannot go backwards.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO profiles (contact_id, through_seq, snapshot) "
+                "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM contacts WHERE id = ?) "
+                "ON CONFLICT (contact_id) DO UPDATE SET through_seq = excluded.through_seq, "
+                "snapshot = excluded.snapshot WHERE excluded.through_seq > profiles.through_seq",
+                [
+                    (contact_id, through_seq, json.dumps(snapshot), contact_id)
+                    for contact_id, snapshot, through_seq in entries
+                ],
+            )
+
+    def move_interactions(self, moves: dict):
+        """
+        Re-key the history of merged contacts ({old id: new id}). Both sides' profiles
+        are dropped, to be rebuilt from the merged log.
+        """
+        with self._lock, self._conn:
+            self._move_interactions(moves)
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+    def add(self, record: dict) -> int:
+        with self._lock, self._conn:
+            contact_id = self._insert(record)
+        self._notify(UPSERT, [contact_id])
+        return contact_id
+
+    def add_many(self, records: list) -> list:
+        """
+        Insert a batch of records with a single executemany in one transaction.
+        Returns the ids of the new rows, in order.
+        """
+        if not records:
+            return []
+        now = time.time()
+        db_columns = list(_DB_COLUMNS.values())
+        rows = []
+        for record in records:
+            values = _to_db_values({column: record.get(column) for column in COLUMNS})
+            rows.append(tuple(values[column] for column in db_columns) + (now,))
+        columns = ", ".join(db_columns + ["updated_at"])
+        placeholders = ", ".join("?" for _ in range(len(db_columns) + 1))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO contacts ({columns}) VALUES ({placeholders})", rows
+            )
+            # The transaction holds the database's write lock: the batch got consecutive ids
+            last_id = self._conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            new_ids = list(range(last_id - len(rows) + 1, last_id + 1))
+            self._log(UPSERT, new_ids)
+        self._notify(UPSERT, new_ids)
+        return new_ids
+
+    def update(self, contact_id: int, fields: dict, expected_version: int = None) -> bool:
+        """
+        Update some fields of one row. With `expected_version`, raises StaleRowError
+        if the row changed since that version was read.
+        """
+        with self._lock, self._conn:
+            updated = self._update(contact_id, fields, expected_version)
+        if updated:
+            self._notify(UPSERT, [contact_id])
+        return updated
+
+    def delete(self, contact_id: int) -> bool:
+        with self._lock, self._conn:
+            deleted = self._delete(contact_id)
+        if deleted:
+            self._notify(DELETE, [contact_id])
+        return deleted
+
+    def apply_changes(self, updates: dict = None, added: list = None, deleted: list = None,
+                      versions: dict = None, moves: dict = None) -> list:
+        """
+        Apply a set of row-level updates ({id: fields}), inserts and deletes in one transaction.
+        `versions` ({id: version as read}) turns on optimistic concurrency for the updated and
+        deleted rows: if any of them changed since, nothing is written and StaleRowError is raised.
+        `moves` ({old id: new id}) re-keys interaction history first (see move_interactions),
+        so merged rows can be deleted in the same transaction. Returns the ids of the inserted rows.
+        """
+        versions = versions or {}
+        new_ids, updated_ids, deleted_ids = [], [], []
+        with self._lock, self._conn:
+            if moves:
+                self._move_interactions(moves)
+            for contact_id in deleted or []:
+                if self._delete(contact_id, versions.get(contact_id)):
+                    deleted_ids.append(contact_id)
+            for contact_id, fields in (updates or {}).items():
+                if self._update(contact_id, fields, versions.get(contact_id)):
+                    updated_ids.append(contact_id)
+            for record in added or []:
+                new_ids.append(self._insert(record))
+        self._notify(DELETE, deleted_ids)
+        self._notify(UPSERT, updated_ids + new_ids)
+        return new_ids
+
+    def seed(self, records: list):
+        """
+        Load the given records if the store is still empty (first start-up).
+        """
+        with self._lock, self._conn:
+            # Take the write lock before checking, so replicas starting together seed once
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]:
+                return
+            new_ids = [self._insert(record) for record in records]
+        self._notify(UPSERT, new_ids)
+
+    # -------------------------------------------------------------------------
+    # Change feed
+    # -------------------------------------------------------------------------
+    def last_change(self) -> int:
+        """
+        Sequence number of the latest write to the store (0 if there has been none).
+        """
+        rows = self._read("SELECT seq FROM sqlite_sequence WHERE name = 'changes'")
+        return rows[0][0] if rows else 0
+
+    def changes_since(self, seq: int):
+        """
+        What changed after change `seq`, by anyone: {"seq": latest change, "upserted":
+        ids added or edited, "deleted": ids removed}. None if the log no longer reaches
+        back that far, in which case the caller should reload everything.
+        """
+        rows = self._read("SELECT seq, op, contact_id FROM changes WHERE seq > ? ORDER BY seq", (seq,))
+        last = rows[-1]["seq"] if rows else self.last_change()
+        if (rows and rows[0]["seq"] != seq + 1) or (not rows and last > seq):
+            return None
+        upserted, deleted = set(), set()
+        for row in rows:
+            if row["op"] == DELETE:
+                deleted.add(row["contact_id"])
+                upserted.discard(row["contact_id"])
+            else:
+                upserted.add(row["contact_id"])
+        return {"seq": last, "upserted": upserted, "deleted": deleted}
+
+    def replay(self, callback, since: int):
+        """
+        Call `callback` for the writes made after change `since`, as subscribe() would have.
+        Derived indexes note last_change(), load, subscribe and then replay, so a write
+        landing while they load is not lost (one delivered twice is harmless).
+        """
+        changes = self.changes_since(since)
+        if changes is None:
+            # The log no longer reaches back that far: re-read every row
+            changes = {"upserted": [contact_id for contact_id, _ in self.names()], "deleted": ()}
+        if changes["deleted"]:
+            callback(DELETE, sorted(changes["deleted"]))
+        if changes["upserted"]:
+            callback(UPSERT, sorted(changes["upserted"]))
+
+    def poll(self) -> int:
+        """
+        Tell the listeners about writes other ContactStore instances (other processes
+        sharing the file) made since the last poll. Returns how many were found.
+        """
+        rows = self._read(
+            "SELECT seq, op, contact_id, writer FROM changes WHERE seq > ? ORDER BY seq", (self._seen_seq,)
+        )
+        if not rows:
+            return 0
+        self._seen_seq = rows[-1]["seq"]
+        rows = [row for row in rows if row["writer"] != self.writer_id]
+        deleted = [row["contact_id"] for row in rows if row["op"] == DELETE]
+        gone = set(deleted)
+        upserted = list(dict.fromkeys(
+            row["contact_id"] for row in rows if row["op"] != DELETE and row["contact_id"] not in gone
+        ))
+        self._notify(DELETE, deleted)
+        self._notify(UPSERT, upserted)
+        return len(rows)
+
+    def follow(self, interval: float = 1.0):
+        """
+        Poll for other processes' writes every `interval` seconds on a daemon thread
+        (and prune old change-log entries now and then). Calling it again is a no-op.
+        """
+        with self._lock:
+            if self._follower is not None or self._in_memory:
+                return
+
+            def run():
+                polls = 0
+                while not self._stop_following.wait(interval):
+                    try:
+                        self.poll()
+                        polls += 1
+                        if polls % 600 == 1:
+                            self.prune_changes()
+                    except sqlite3.Error:
+                        logger.exception("Polling the contact store's change log failed")
+
+            self._follower = threading.Thread(target=run, name="contact-store-follower", daemon=True)
+            self._follower.start()
+
+    def prune_changes(self, older_than: float = CHANGE_LOG_SECONDS) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM changes WHERE at < ?", (time.time() - older_than,))
+        return cursor.rowcount
+
+    # -------------------------------------------------------------------------
+    # Helpers (callers hold the lock and an open transaction)
+    # -------------------------------------------------------------------------
+    def _insert(self, record: dict) -> int:
+        values = _to_db_values(record)
+        values["updated_at"] = time.time()
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        cursor = self._conn.execute(
+            f"INSERT INTO contacts ({columns}) VALUES ({placeholders})",
+            tuple(values.values()),
+        )
+        self._log(UPSERT, [cursor.lastrowid])
+        return cursor.lastrowid
+
+    def _update(self, contact_id: int, fields: dict, expected_version: int = None) -> bool:
+        values = _to_db_values(fields)
+        if not values:
+            return False
+        values["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        sql = f"UPDATE contacts SET {assignments}, version = version + 1 WHERE id = ?"
+        params = (*values.values(), contact_id)
+        if expected_version is not None:
+            sql += " AND version = ?"
+            params += (expected_version,)
+        cursor = self._conn.execute(sql, params)
+        if cursor.rowcount == 0 and expected_version is not None:
+            raise StaleRowError([contact_id])
+        if cursor.rowcount > 0:
+            self._log(UPSERT, [contact_id])
+        return cursor.rowcount > 0
+
+    def _move_interactions(self, moves: dict):
+        for old_id, new_id in moves.items():
+            self._conn.execute("UPDATE interactions SET contact_id = ? WHERE contact_id = ?", (new_id, old_id))
+            self._conn.execute("DELETE FROM profiles WHERE contact_id IN (?, ?)", (old_id, new_id))
+
+    def _delete(self, contact_id: int, expected_version: int = None) -> bool:
+        sql = "DELETE FROM contacts WHERE id = ?"
+        params = (contact_id,)
+        if expected_version is not None:
+            sql += " AND version = ?"
+            params += (expected_version,)
+        cursor = self._conn.execute(sql, params)
+        if cursor.rowcount == 0 and expected_version is not None:
+            raise StaleRowError([contact_id])
+        if cursor.rowcount > 0:
+            self._conn.execute("DELETE FROM suggestions WHERE contact_id = ?", (contact_id,))
+            self._conn.execute("DELETE FROM interactions WHERE contact_id = ?", (contact_id,))
+            self._conn.execute("DELETE FROM profiles WHERE contact_id = ?", (contact_id,))
+            self._log(DELETE, [contact_id])
+        return cursor.rowcount > 0
+
+    def _log(self, op: str, ids: list):
+        now = time.time()
+        self._conn.executemany(
+            "INSERT INTO changes (contact_id, op, writer, at) VALUES (?, ?, ?, ?)",
+            [(contact_id, op, self.writer_id, now) for contact_id in ids],
+        )
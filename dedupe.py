@@ -0,0 +1,403 @@
+"""
+Profile de-duplication (entity resolution) for Basil's Brain.
+
+New extractions are matched against existing contacts before they are written.
+Candidates are found through blocking keys (normalized name, initials,
+phonetic code) so only a handful of rows are ever compared, and a match is
+merged into the existing row with the earlier values kept in
+analysis_json["history"].
+
+dedupe_store() runs the same matching over the whole store in one pass.
+"""
+import threading
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import history
+import metrics
+from contact_store import COLUMNS, DELETE, StaleRowError
+from name_index import normalize_name
+
+MATCH_THRESHOLD = 0.88
+PHONETIC_MATCH_THRESHOLD = 0.75
+# Minimum bigram Dice coefficient before two names are compared in full
+BIGRAM_PREFILTER = 0.5
+# Blocks larger than this (e.g. very common initials) are not scanned
+MAX_BLOCK_SIZE = 200
+# Times a merge is re-planned when a matched row changed under it before giving up
+MAX_MERGE_ATTEMPTS = 5
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def soundex(word: str) -> str:
+    word = "".join(char for char in word.lower() if char.isalpha())
+    if not word:
+        return ""
+    code = word[0].upper()
+    previous = _SOUNDEX_CODES.get(word[0], "")
+    for char in word[1:]:
+        digit = _SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+        if char not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def blocking_keys(name: str) -> set:
+    """
+    Keys a contact is indexed under.
+    """
+    tokens = normalize_name(name).split()
+    if not tokens:
+        return set()
+    keys = {
+        "name:" + " ".join(tokens),
+        "initials:" + "".join(token[0] for token in tokens),
+        "phonetic:" + " ".join(soundex(token) for token in tokens),
+        "first:" + soundex(tokens[0]),
+    }
+    if len(tokens) == 1:
+        keys.add("single:" + soundex(tokens[0]))
+    return keys
+
+
+def lookup_keys(name: str) -> set:
+    """
+    Keys to probe when looking for matches of `name`. A lone first name probes
+    every contact with that first name; a full name only probes lone first names,
+    so the (large) first-name blocks are never scanned for ordinary lookups.
+    """
+    tokens = normalize_name(name).split()
+    if not tokens:
+        return set()
+    keys = blocking_keys(name) - {"first:" + soundex(tokens[0]), "single:" + soundex(tokens[0])}
+    if len(tokens) == 1:
+        keys.add("first:" + soundex(tokens[0]))
+    else:
+        keys.add("single:" + soundex(tokens[0]))
+    return keys
+
+
+# Words that say nothing about a person's interests; sharing them is no evidence of a match
+INTEREST_STOPWORDS = frozenset("""
+    about also and any are big but can fan for from going good great has have her his into just
+    like liked likes lot lots love loved loves more new not now one really she some that the their
+    them they this very was wants who will with enjoy enjoys interested interest interests
+    favourite favorite thing things stuff
+""".split())
+
+
+def _interest_tokens(text: str) -> set:
+    return {
+        token for token in normalize_name(text).split()
+        if len(token) > 2 and token not in INTEREST_STOPWORDS
+    }
+
+
+def _features(record: dict) -> tuple:
+    """
+    (normalized name, name tokens, phonetic codes, interest tokens, name bigrams) of a record.
+    """
+    name = normalize_name(record.get("Name"))
+    tokens = name.split()
+    return (
+        name,
+        tokens,
+        [soundex(token) for token in tokens],
+        _interest_tokens(record.get("other_interesting_items", "")),
+        frozenset(name[i:i + 2] for i in range(len(name) - 1)),
+    )
+
+
+def _features_match(a: tuple, b: tuple) -> bool:
+    name_a, tokens_a, phonetic_a, interests_a, bigrams_a = a
+    name_b, tokens_b, phonetic_b, interests_b, bigrams_b = b
+    if not name_a or not name_b:
+        return False
+    if name_a == name_b:
+        return True
+
+    # "John" vs "John Smith": same first name and something else in common
+    if (len(tokens_a) == 1 or len(tokens_b) == 1) and tokens_a[0] == tokens_b[0]:
+        return not interests_a.isdisjoint(interests_b)
+
+    # Cheap prefilter: names this close share most of their character bigrams.
+    # Most candidate pairs from a block stop here, before the costlier ratio().
+    if bigrams_a and bigrams_b:
+        shared = len(bigrams_a & bigrams_b)
+        if 2 * shared < BIGRAM_PREFILTER * (len(bigrams_a) + len(bigrams_b)):
+            return False
+    similarity = SequenceMatcher(None, name_a, name_b).ratio()
+    shared_interests = not interests_a.isdisjoint(interests_b)
+    if similarity >= MATCH_THRESHOLD:
+        # A near-identical spelling is enough for the same first name; "Mark Jones" and
+        # "Mary Jones" are as close, so different first names also need shared interests
+        return tokens_a[0] == tokens_b[0] or shared_interests
+    return (
+        phonetic_a == phonetic_b
+        and similarity >= PHONETIC_MATCH_THRESHOLD
+        and shared_interests
+    )
+
+
+def is_match(a: dict, b: dict) -> bool:
+    """
+    Decide whether two records describe the same person.
+    """
+    return _features_match(_features(a), _features(b))
+
+
+def _merge_items(existing: str, new: str) -> str:
+    items, seen = [], set()
+    for text in (existing, new):
+        for item in (text or "").split(","):
+            item = item.strip()
+            if item and item.lower() not in seen:
+                seen.add(item.lower())
+                items.append(item)
+    return ", ".join(items)
+
+
+def merge_records(existing: dict, new: dict) -> dict:
+    """
+    Fields for `existing` after folding `new` into it. The previous values and
+    the incoming extraction are appended to analysis_json["history"].
+    """
+    analysis_json = dict(existing.get("analysis_json") or {})
+    history = list(analysis_json.get("history", []))
+    history.append({
+        "merged_at": time.time(),
+        "previous": {
+            "Name": existing.get("Name", ""),
+            "last_recommendation": existing.get("last_recommendation", ""),
+            "other_interesting_items": existing.get("other_interesting_items", ""),
+        },
+        "extraction": {key: value for key, value in (new.get("analysis_json") or {}).items() if key != "history"},
+    })
+    analysis_json["history"] = history
+
+    names = [existing.get("Name") or "", new.get("Name") or ""]
+    return {
+        # Keep the most complete spelling of the name
+        "Name": max(names, key=lambda name: len(normalize_name(name).split())),
+        # The newest recommendation wins
+        "last_recommendation": new.get("last_recommendation") or existing.get("last_recommendation", ""),
+        "other_interesting_items": _merge_items(
+            existing.get("other_interesting_items"), new.get("other_interesting_items")
+        ),
+        "analysis_json": analysis_json,
+    }
+
+
+class Resolver:
+    """
+    Blocking index over the contact store used to match incoming rows.
+    Subscribes to the store so the index follows every write.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.RLock()
+        self._blocks = defaultdict(set)   # blocking key -> ids
+        self._keys = {}                   # id -> blocking keys
+
+    @classmethod
+    def from_store(cls, store):
+        resolver = cls(store)
+        seq = store.last_change()
+        for contact_id, name in store.names():
+            resolver._index(contact_id, name)
+        # Writes made while indexing are replayed, so no contact is left without blocking keys
+        store.subscribe(resolver.on_store_change)
+        store.replay(resolver.on_store_change, seq)
+        return resolver
+
+    def _index(self, contact_id: int, name: str):
+        with self._lock:
+            self._unindex(contact_id)
+            keys = blocking_keys(name)
+            self._keys[contact_id] = keys
+            for key in keys:
+                self._blocks[key].add(contact_id)
+
+    def _unindex(self, contact_id: int):
+        with self._lock:
+            for key in self._keys.pop(contact_id, ()):
+                ids = self._blocks.get(key)
+                if ids is not None:
+                    ids.discard(contact_id)
+                    if not ids:
+                        del self._blocks[key]
+
+    def on_store_change(self, op: str, ids: list):
+        if op == DELETE:
+            for contact_id in ids:
+                self._unindex(contact_id)
+            return
+        for contact_id, name in self.store.names(ids):
+            self._index(contact_id, name)
+
+    def candidates(self, name: str) -> set:
+        with self._lock:
+            ids = set()
+            for key in lookup_keys(name):
+                block = self._blocks.get(key, set())
+                if len(block) <= MAX_BLOCK_SIZE:
+                    ids |= block
+            return ids
+
+    def find_match(self, row: dict):
+        """
+        The existing contact `row` should be merged into, or None.
+        """
+        candidate_ids = self.candidates(row.get("Name", ""))
+        if not candidate_ids:
+            return None
+        for candidate in self.store.get_many(sorted(candidate_ids)):
+            if is_match(candidate, row):
+                return candidate
+        return None
+
+    def _plan(self, rows: list):
+        """
+        resolve_batch, plus where each row ends up (("update", contact id) or
+        ("add", index into the rows to insert)) and the version of every matched row as read.
+        """
+        updates, added, merged, targets, versions = {}, [], 0, [], {}
+        for row in rows:
+            match = self.find_match(row)
+            if match is not None:
+                versions.setdefault(match["id"], match["version"])
+                current = dict(match, **updates.get(match["id"], {}))
+                updates[match["id"]] = merge_records(current, row)
+                merged += 1
+                targets.append(("update", match["id"]))
+                continue
+            pending = next((i for i, other in enumerate(added) if is_match(other, row)), None)
+            if pending is not None:
+                added[pending] = merge_records(added[pending], row)
+                merged += 1
+                targets.append(("add", pending))
+            else:
+                added.append(row)
+                targets.append(("add", len(added) - 1))
+        return updates, added, merged, targets, versions
+
+    def resolve_batch(self, rows: list):
+        """
+        Plan how to write `rows`: ({id: merged fields}, [rows to insert], number merged).
+        Rows are matched against the store and against earlier rows of the same batch.
+        """
+        updates, added, merged, _, _ = self._plan(rows)
+        return updates, added, merged
+
+    def upsert(self, row: dict):
+        """
+        Write one row, merging it into a matching contact if there is one.
+        Returns (contact id, merged?).
+        """
+        contact_ids, merged = self.upsert_many([row])
+        return contact_ids[0], bool(merged)
+
+    def upsert_many(self, rows: list):
+        """
+        Write rows in one transaction, merging each into a matching contact (or an
+        earlier row of the same batch). Returns (the contact id each row was written
+        to, in row order, number merged). A matched contact that someone else changed
+        in the meantime is re-read and the batch merged again, so no write is lost.
+        """
+        for attempt in range(MAX_MERGE_ATTEMPTS):
+            updates, added, merged, targets, versions = self._plan(rows)
+            try:
+                new_ids = self.store.apply_changes(updates=updates, added=added, versions=versions)
+                break
+            except StaleRowError:
+                metrics.inc("dedupe_merge_conflicts_total")
+                if attempt == MAX_MERGE_ATTEMPTS - 1:
+                    raise
+        return [target if kind == "update" else new_ids[target] for kind, target in targets], merged
+
+
+def dedupe_store(store) -> int:
+    """
+    Merge duplicate contacts across the whole store in one pass. Only pairs
+    sharing a blocking key are compared, so the work grows with the number of
+    contacts rather than its square. Returns the number of rows merged away.
+    Rows edited while the pass runs are left alone: the pass starts over.
+    """
+    for attempt in range(MAX_MERGE_ATTEMPTS):
+        try:
+            return _dedupe_pass(store)
+        except StaleRowError:
+            metrics.inc("dedupe_merge_conflicts_total")
+            if attempt == MAX_MERGE_ATTEMPTS - 1:
+                raise
+
+
+def _dedupe_pass(store) -> int:
+    records = {record["id"]: record for record in store.list()}
+    features = {contact_id: _features(record) for contact_id, record in records.items()}
+    blocks = defaultdict(list)
+    for contact_id, record in records.items():
+        for key in blocking_keys(record["Name"]):
+            blocks[key].append(contact_id)
+
+    parent = {contact_id: contact_id for contact_id in records}
+
+    def find(contact_id):
+        while parent[contact_id] != contact_id:
+            parent[contact_id] = parent[parent[contact_id]]
+            contact_id = parent[contact_id]
+        return contact_id
+
+    compared = set()
+    for a, record in records.items():
+        for key in lookup_keys(record["Name"]):
+            block = blocks.get(key, ())
+            if len(block) > MAX_BLOCK_SIZE:
+                continue
+            for b in block:
+                pair = (min(a, b), max(a, b))
+                if a == b or pair in compared:
+                    continue
+                compared.add(pair)
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b and _features_match(features[a], features[b]):
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = defaultdict(list)
+    for contact_id in records:
+        clusters[find(contact_id)].append(contact_id)
+
+    updates, deleted = {}, []
+    for root, members in clusters.items():
+        if len(members) < 2:
+            continue
+        merged = records[root]
+        for contact_id in sorted(members):
+            if contact_id != root:
+                merged = dict(merged, **merge_records(merged, records[contact_id]))
+                deleted.append(contact_id)
+        updates[root] = {column: merged[column] for column in COLUMNS}
+
+    if updates:
+        # The merged contacts' interaction history carries over to the one they were merged into,
+        # in the same transaction that deletes them
+        store.apply_changes(
+            updates=updates,
+            deleted=deleted,
+            versions={contact_id: records[contact_id]["version"] for contact_id in [*updates, *deleted]},
+            moves={contact_id: find(contact_id) for contact_id in deleted},
+        )
+        history.compact(store, list(updates))
+    return len(deleted)
@@ -0,0 +1,183 @@
+"""
+Semantic "who would like this?" search over contact interests.
+
+Each contact's other_interesting_items and last_recommendation are embedded
+into one row of a contiguous float32 matrix. Queries are embedded in a batch
+and scored against every contact with a single matrix product (vectors are
+L2-normalized, so the dot product is the cosine similarity).
+
+Embedders are pluggable: HashingEmbedder is local and deterministic (no
+network, same vectors on every machine); OpenAIEmbedder uses the embeddings API.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from contact_store import DELETE
+
+_TOKEN = re.compile(r"\w+")
+# The only columns contact_text() reads
+EMBEDDED_COLUMNS = ["other_interesting_items", "last_recommendation"]
+
+
+def contact_text(record: dict) -> str:
+    return f"{record.get('other_interesting_items') or ''}. {record.get('last_recommendation') or ''}"
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class HashingEmbedder:
+    """
+    Feature-hashing embedder over word tokens and character trigrams.
+    Trigrams make "painter" and "painting" land close to each other.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _features(self, text: str):
+        for token in _TOKEN.findall(text.lower()):
+            yield token, 1.0
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], 0.5
+
+    def embed(self, texts: list) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text or ""):
+                hashed = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if hashed & 0x80000000 else -1.0
+                vectors[row, hashed % self.dim] += sign * weight
+        return _normalize_rows(vectors)
+
+
+class OpenAIEmbedder:
+    def __init__(self, client, model: str = "text-embedding-3-small", batch_size: int = 256):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+
+    def embed(self, texts: list) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [text or " " for text in texts[start:start + self.batch_size]]
+            response = self.client.embeddings.create(model=self.model, input=batch)
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return _normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+
+class EmbeddingIndex:
+    """
+    Contiguous matrix of contact embeddings with id <-> row bookkeeping.
+    Rows are removed by moving the last row into the gap, so the live part of
+    the matrix is always `self._matrix[:self._size]`.
+    """
+
+    def __init__(self, embedder, store=None):
+        self.embedder = embedder
+        self._store = store
+        self._lock = threading.RLock()
+        self._matrix = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._positions = {}
+        self._size = 0
+
+    @classmethod
+    def from_store(cls, store, embedder, batch_size: int = 1024):
+        index = cls(embedder, store)
+        seq = store.last_change()
+        for batch in store.scan(EMBEDDED_COLUMNS, batch_size):
+            index.upsert([row["id"] for row in batch], [contact_text(row) for row in batch])
+        # Writes made while embedding are replayed, so no contact is left out
+        store.subscribe(index.on_store_change)
+        store.replay(index.on_store_change, seq)
+        return index
+
+    def __len__(self):
+        return self._size
+
+    # -------------------------------------------------------------------------
+    # Maintenance
+    # -------------------------------------------------------------------------
+    def _reserve(self, extra: int, dim: int):
+        needed = self._size + extra
+        if self._matrix is not None and needed <= len(self._matrix):
+            return
+        capacity = max(needed, 2 * (len(self._matrix) if self._matrix is not None else 0), 1024)
+        matrix = np.zeros((capacity, dim), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+            ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def upsert(self, ids: list, texts: list):
+        if not ids:
+            return
+        vectors = self.embedder.embed(texts)
+        with self._lock:
+            self._reserve(len(ids), vectors.shape[1])
+            for contact_id, vector in zip(ids, vectors):
+                position = self._positions.get(contact_id)
+                if position is None:
+                    position = self._size
+                    self._positions[contact_id] = position
+                    self._ids[position] = contact_id
+                    self._size += 1
+                self._matrix[position] = vector
+
+    def remove(self, ids: list):
+        with self._lock:
+            for contact_id in ids:
+                position = self._positions.pop(contact_id, None)
+                if position is None:
+                    continue
+                last = self._size - 1
+                if position != last:
+                    moved_id = int(self._ids[last])
+                    self._matrix[position] = self._matrix[last]
+                    self._ids[position] = moved_id
+                    self._positions[moved_id] = position
+                self._size -= 1
+
+    def on_store_change(self, op: str, ids: list):
+        if op == DELETE:
+            self.remove(ids)
+            return
+        rows = self._store.get_many(ids, decode_analysis=False)
+        self.upsert([row["id"] for row in rows], [contact_text(row) for row in rows])
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    def query(self, texts: list, k: int = 10) -> list:
+        """
+        Top-k contacts for each query text: one list of (contact id, cosine score) per query.
+        """
+        if not texts:
+            return []
+        queries = self.embedder.embed(texts)
+        with self._lock:
+            if self._size == 0:
+                return [[] for _ in texts]
+            scores = queries @ self._matrix[:self._size].T
+            ids = self._ids[:self._size].copy()
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(int(ids[i]), float(scores[row, i])) for i in ordered])
+        return results
+
+    def who_would_like(self, text: str, k: int = 10) -> list:
+        return self.query([text], k)[0]
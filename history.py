@@ -0,0 +1,176 @@
+"""
+Interaction history per contact.
+
+Every capture, extraction, suggestion and edit is appended to the store's
+interactions log with its timestamp; nothing in the log is ever rewritten. Each
+contact also has a materialized profile snapshot: counts, first and last
+contact, recent recommendations and the latest few interactions. Compaction
+folds only the entries logged since the snapshot was taken, so reading a
+profile (or its "last N interactions") is one row however long the history is.
+
+    record_captures(store, [(contact_id, transcript, extraction), ...])
+    profile(store, contact_id)
+    recent_interactions(store, contact_id, n=5)
+"""
+import time
+
+TRANSCRIPT = "transcript"
+EXTRACTION = "extraction"
+SUGGESTIONS = "suggestions"
+EDIT = "edit"
+
+# Interactions kept inline in the snapshot; older ones are read from the log
+RECENT_LIMIT = 10
+RECOMMENDATION_LIMIT = 5
+TRANSCRIPT_PREVIEW_CHARS = 280
+
+
+def empty_profile() -> dict:
+    return {
+        "interactions": 0,
+        "counts": {},
+        "first_at": None,
+        "last_at": None,
+        "recommendations": [],
+        "last_transcript": "",
+        "last_suggestions": [],
+        "recent": [],
+    }
+
+
+def describe(entry: dict) -> str:
+    """
+    One line of text for an interaction.
+    """
+    payload = entry["payload"]
+    if entry["kind"] == TRANSCRIPT:
+        text = payload.get("text") or ""
+        return text if len(text) <= 160 else text[:157] + "..."
+    if entry["kind"] == EXTRACTION:
+        parts = [
+            f"{label}: {payload[key]}"
+            for label, key in (("recommended", "last_recommendation"), ("interests", "other_interesting_items"))
+            if payload.get(key)
+        ]
+        return "; ".join(parts) or "Nothing extracted"
+    if entry["kind"] == SUGGESTIONS:
+        return "; ".join(payload.get("suggestions", []))
+    if entry["kind"] == EDIT:
+        return "Edited " + ", ".join(f"{column} → {value}" for column, value in payload.get("fields", {}).items())
+    return ""
+
+
+def _remember_recommendation(profile: dict, recommendation: str, at: float):
+    if not recommendation:
+        return
+    kept = [item for item in profile["recommendations"] if item["text"] != recommendation]
+    profile["recommendations"] = ([{"text": recommendation, "at": at}] + kept)[:RECOMMENDATION_LIMIT]
+
+
+def fold(profile: dict, entry: dict) -> dict:
+    """
+    The profile with one more interaction applied (entries must come in log order).
+    """
+    kind, payload, at = entry["kind"], entry["payload"], entry["at"]
+    profile["interactions"] += 1
+    profile["counts"][kind] = profile["counts"].get(kind, 0) + 1
+    profile["first_at"] = at if profile["first_at"] is None else profile["first_at"]
+    profile["last_at"] = at
+    if kind == TRANSCRIPT:
+        profile["last_transcript"] = (payload.get("text") or "")[:TRANSCRIPT_PREVIEW_CHARS]
+    elif kind == EXTRACTION:
+        _remember_recommendation(profile, payload.get("last_recommendation"), at)
+    elif kind == SUGGESTIONS:
+        profile["last_suggestions"] = list(payload.get("suggestions", []))
+    elif kind == EDIT:
+        _remember_recommendation(profile, payload.get("fields", {}).get("last_recommendation"), at)
+    summary = {"seq": entry["seq"], "kind": kind, "at": at, "text": describe(entry)}
+    profile["recent"] = ([summary] + profile["recent"])[:RECENT_LIMIT]
+    return profile
+
+
+# -----------------------------------------------------------------------------
+# Compaction
+# -----------------------------------------------------------------------------
+def compact(store, contact_ids) -> int:
+    """
+    Fold every interaction logged since each contact's snapshot into it.
+    Returns the number of interactions folded.
+    """
+    snapshots, folded = [], 0
+    for contact_id in dict.fromkeys(contact_ids):
+        stored = store.get_profile(contact_id)
+        snapshot, through_seq = stored if stored is not None else (empty_profile(), 0)
+        entries = store.interactions(contact_id, after_seq=through_seq)
+        if not entries:
+            continue
+        for entry in entries:
+            snapshot = fold(snapshot, entry)
+        snapshots.append((contact_id, snapshot, entries[-1]["seq"]))
+        folded += len(entries)
+    store.set_profiles(snapshots)
+    return folded
+
+
+def record(store, entries: list) -> int:
+    """
+    Append (contact id, kind, payload) entries, all stamped now, and compact the
+    contacts they belong to. Returns how many were written.
+    """
+    if not entries:
+        return 0
+    now = time.time()
+    written = store.append_interactions([(contact_id, kind, payload, now) for contact_id, kind, payload in entries])
+    compact(store, [contact_id for contact_id, _, _ in entries])
+    return written
+
+
+def record_captures(store, captures) -> int:
+    """
+    Log a transcript and its extraction for each (contact id, transcript, extraction).
+    """
+    entries = []
+    for contact_id, transcript, extraction in captures:
+        entries.append((contact_id, TRANSCRIPT, {"text": transcript or ""}))
+        entries.append((contact_id, EXTRACTION, dict(extraction or {})))
+    return record(store, entries)
+
+
+def record_suggestions(store, results: dict) -> int:
+    """
+    Log newly generated suggestions ({contact id: [suggestion, ...]}).
+    """
+    return record(store, [
+        (contact_id, SUGGESTIONS, {"suggestions": list(suggestions)}) for contact_id, suggestions in results.items()
+    ])
+
+
+def record_edits(store, updates: dict) -> int:
+    """
+    Log Curate edits ({contact id: changed fields}).
+    """
+    return record(store, [(contact_id, EDIT, {"fields": dict(fields)}) for contact_id, fields in updates.items()])
+
+
+# -----------------------------------------------------------------------------
+# Reads
+# -----------------------------------------------------------------------------
+def profile(store, contact_id: int) -> dict:
+    """
+    The contact's compacted profile (empty if nothing was ever logged).
+    """
+    stored = store.get_profile(contact_id)
+    return stored[0] if stored is not None else empty_profile()
+
+
+def recent_interactions(store, contact_id: int, n: int = 5) -> list:
+    """
+    The contact's last `n` interactions, newest first, as {"seq", "kind", "at", "text"}.
+    Up to RECENT_LIMIT come straight from the snapshot; more are read from the log.
+    """
+    if n <= RECENT_LIMIT:
+        return profile(store, contact_id)["recent"][:n]
+    return [
+        {"seq": entry["seq"], "kind": entry["kind"], "at": entry["at"], "text": describe(entry)}
+        for entry in store.interactions(contact_id, limit=n)
+    ]
@@ -0,0 +1,77 @@
+"""
+Bulk ingestion into the contact store.
+
+Rows are buffered and committed in batches (one executemany per batch) so
+importing thousands of notes costs a handful of transactions instead of one
+full copy of the contact table per row.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import EMPTY_EXTRACTION, extract_people, row_from_extraction
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class BatchWriter:
+    """
+    Append-only buffer in front of ContactStore.add_many.
+
+        with BatchWriter(store) as writer:
+            for record in records:
+                writer.add(record)
+    """
+
+    def __init__(self, store, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.store = store
+        self.batch_size = batch_size
+        self.written = 0
+        self._buffer = []
+
+    def add(self, record: dict):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def extend(self, records):
+        for record in records:
+            self.add(record)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self.written += len(self.store.add_many(batch))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Keep whatever was buffered before a failure; the rows themselves are valid
+        self.flush()
+        return False
+
+
+def ingest_records(store, records, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Write pre-extracted records (dicts with "Name", "last_recommendation", ...) in batches.
+    Returns the number of rows written.
+    """
+    with BatchWriter(store, batch_size) as writer:
+        writer.extend(records)
+    return writer.written
+
+
+def ingest_transcripts(store, client, transcripts, batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = 4,
+                       cache=None) -> int:
+    """
+    Extract the people in each transcript (several extractions in flight at once)
+    and write the resulting rows in batches. Returns the number of rows written.
+    """
+    def to_rows(transcript_text):
+        people = extract_people(client, transcript_text, cache=cache) or [dict(EMPTY_EXTRACTION)]
+        return [row_from_extraction(person) for person in people]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, BatchWriter(store, batch_size) as writer:
+        for rows in pool.map(to_rows, transcripts):
+            writer.extend(rows)
+    return writer.written
@@ -0,0 +1,145 @@
+"""
+Background processing of voice notes.
+
+The Capture tab hands each recording to a JobQueue and returns immediately;
+a small thread pool runs the pipeline and writes the finished row to the
+contact store. The UI polls job status instead of blocking on a spinner.
+"""
+import contextlib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from pipeline import People
+
+QUEUED = "queued"
+TRANSCRIBING = "transcribing"
+ANALYZING = "analyzing"
+DONE = "done"
+FAILED = "failed"
+
+FINISHED_STATUSES = (DONE, FAILED)
+
+
+class Job:
+    def __init__(self, owner: str = None, label: str = ""):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.label = label
+        self.status = QUEUED
+        self.error = None
+        self.summary = ""
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "label": self.label,
+            "status": self.status,
+            "result": self.summary,
+            "error": self.error or "",
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class JobQueue:
+    """
+    Thread pool that runs People.process_audio_and_add_row (or bulk imports) in the background.
+    Keeps the most recent `max_history` jobs for status polling.
+    """
+
+    def __init__(self, store, cache=None, resolver=None, max_workers: int = 4, max_history: int = 500):
+        self.store = store
+        self.cache = cache
+        self.resolver = resolver
+        self.max_history = max_history
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="basil-job")
+
+    def submit(self, audio_bytes: bytes, client, owner: str = None, label: str = "",
+               filename: str = "voice_note.wav") -> str:
+        """
+        Queue one voice note for People.process_audio_and_add_row.
+        """
+        def process(stage):
+            result = People.process_audio_and_add_row(
+                audio_bytes, client=client, store=self.store, stage=stage, cache=self.cache,
+                resolver=self.resolver, filename=filename
+            )
+            if not result.parsed:
+                raise ValueError("Could not parse JSON from the analysis.")
+            names = ", ".join(row.get("Name", "") or "unnamed" for row in result.rows)
+            if not result.merged:
+                return names
+            if len(result.rows) == 1:
+                return f"{names} (merged into existing profile)"
+            return f"{names} ({result.merged} merged into existing profiles)"
+
+        return self.submit_task(process, owner=owner, label=label)
+
+    def submit_task(self, fn, owner: str = None, label: str = "") -> str:
+        """
+        Queue any pipeline-shaped task. `fn(stage)` gets the same stage callback as
+        People.process_audio_and_add_row and returns a short summary string.
+        """
+        job = Job(owner=owner, label=label)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        return job.id
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def jobs(self, owner: str = None) -> list:
+        """
+        Status snapshots, newest first, optionally only for one owner (session).
+        """
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if owner is None or job.owner == owner]
+            return [job.to_dict() for job in sorted(jobs, key=lambda job: job.created_at, reverse=True)]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    # -------------------------------------------------------------------------
+    # Worker side
+    # -------------------------------------------------------------------------
+    def _set_status(self, job: Job, status: str):
+        with self._lock:
+            job.status = status
+            job.updated_at = time.time()
+
+    @contextlib.contextmanager
+    def _stage(self, job: Job, name: str):
+        self._set_status(job, name)
+        yield
+
+    def _run(self, job: Job, fn):
+        metrics.observe("job_queue_wait_seconds", time.time() - job.created_at)
+        try:
+            job.summary = fn(lambda name: self._stage(job, name))
+        except Exception as e:
+            job.error = str(e)
+            self._set_status(job, FAILED)
+        else:
+            self._set_status(job, DONE)
+
+    def _prune(self):
+        # Drop the oldest finished jobs once we keep more than max_history
+        if len(self._jobs) <= self.max_history:
+            return
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status in FINISHED_STATUSES),
+            key=lambda job: job.updated_at,
+        )
+        for job in finished[: len(self._jobs) - self.max_history]:
+            del self._jobs[job.id]
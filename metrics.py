@@ -0,0 +1,269 @@
+"""
+Timing spans, counters, gauges and rolling histograms for the audio-to-profile pipeline.
+
+Code under measurement wraps its work in a span:
+
+    with metrics.span("extract", model=EXTRACTION_MODEL) as attrs:
+        ...
+        attrs["transcript_chars"] = len(text)
+
+Each span adds its duration to the `<name>_seconds` histogram (labelled with
+the span's labels and its outcome) and is kept, with its attributes, in a
+ring buffer of recent spans. Histograms keep cumulative buckets for Prometheus
+and a rolling window of samples for percentiles.
+
+The process-wide registry is `metrics.registry`; `prometheus_text()` and
+`json_lines()` dump it. Set FORGET_ME_NOT_METRICS_LOG to a file path to also
+append every span to that file as a JSON line.
+"""
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
+METRICS_LOG = os.environ.get("FORGET_ME_NOT_METRICS_LOG")
+WINDOW_SECONDS = 15 * 60
+MAX_WINDOW_SAMPLES = 2048
+RECENT_SPANS = 500
+# Seconds; also used for sizes/tokens, where the top buckets do the work
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# USD per 1M tokens (input, output), for the cost counter
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-3-small": (0.02, 0.0),
+}
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _label_text(labels: tuple) -> str:
+    return ", ".join(f"{key}={value}" for key, value in labels)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """
+    Cumulative bucket counts (for Prometheus) plus a rolling window of recent
+    samples (for p50/p90/p99 over the last WINDOW_SECONDS).
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._window = deque(maxlen=MAX_WINDOW_SAMPLES)
+
+    def observe(self, value: float, now: float = None):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self._window.append((now if now is not None else time.time(), value))
+
+    def window(self, now: float = None) -> list:
+        cutoff = (now if now is not None else time.time()) - WINDOW_SECONDS
+        while self._window and self._window[0][0] < cutoff:
+            self._window.popleft()
+        return sorted(value for _, value in self._window)
+
+    def summary(self, now: float = None) -> dict:
+        values = self.window(now)
+
+        def pick(q):
+            return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+        return {
+            "count": self.count,
+            "window_count": len(values),
+            "p50": pick(0.50),
+            "p90": pick(0.90),
+            "p99": pick(0.99),
+            "max": values[-1] if values else None,
+            "mean": sum(values) / len(values) if values else None,
+        }
+
+
+class Metrics:
+    def __init__(self, log_path: str = METRICS_LOG):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._counters = {}     # (name, label key) -> value
+        self._gauges = {}       # (name, label key) -> current value
+        self._histograms = {}   # (name, label key) -> Histogram
+        self._spans = deque(maxlen=RECENT_SPANS)
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, buckets: tuple = DEFAULT_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **labels):
+        """
+        Time the block. Yields a dict the block can add attributes to (sizes,
+        token counts, cache hits); they are kept with the span in recent_spans().
+        """
+        attrs = {}
+        started = time.time()
+        clock = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield attrs
+        except GeneratorExit:
+            # A streaming consumer stopped early; that is not a failure
+            raise
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            duration = time.perf_counter() - clock
+            self.observe(f"{name}_seconds", duration, outcome=outcome, **labels)
+            record = {
+                "span": name,
+                "start": started,
+                "duration_s": round(duration, 6),
+                "outcome": outcome,
+                **labels,
+                **attrs,
+            }
+            with self._lock:
+                self._spans.append(record)
+            if self.log_path:
+                self._append_log(record)
+
+    def record_usage(self, model: str, usage):
+        """
+        Count the tokens (and estimated cost) of one OpenAI response's `usage`.
+        Returns the token counts, for span attributes.
+        """
+        if usage is None:
+            return {}
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self.inc("openai_tokens_total", prompt_tokens, model=model, kind="prompt")
+        self.inc("openai_tokens_total", completion_tokens, model=model, kind="completion")
+        prices = MODEL_PRICES.get(model)
+        if prices:
+            cost = (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+            self.inc("openai_cost_usd_total", cost, model=model)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+    def _append_log(self, record: dict):
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError:
+            # Diagnostics must never break the pipeline
+            pass
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._spans.clear()
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+    def recent_spans(self, limit: int = None) -> list:
+        with self._lock:
+            spans = list(self._spans)
+        return spans[-limit:] if limit else spans
+
+    def counters(self) -> list:
+        with self._lock:
+            items = sorted(self._counters.items())
+        return [{"name": name, "labels": _label_text(labels), "value": value} for (name, labels), value in items]
+
+    def gauges(self) -> list:
+        with self._lock:
+            items = sorted(self._gauges.items())
+        return [{"name": name, "labels": _label_text(labels), "value": value} for (name, labels), value in items]
+
+    def histogram_summaries(self) -> list:
+        """
+        One row per histogram series with count and rolling-window percentiles.
+        """
+        now = time.time()
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return [
+                {"name": name, "labels": _label_text(labels), **histogram.summary(now)}
+                for (name, labels), histogram in items
+            ]
+
+    def prometheus_text(self) -> str:
+        lines, typed = [], set()
+
+        def series(name, labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return name
+            body = ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+            return f"{name}{{{body}}}"
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(self._histograms.items())
+            for (name, labels), value in counters:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{series(name, labels)} {value:g}")
+            for (name, labels), value in gauges:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} gauge")
+                    typed.add(name)
+                lines.append(f"{series(name, labels)} {value:g}")
+            for (name, labels), histogram in histograms:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f"{series(name + '_bucket', labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{series(name + '_sum', labels)} {histogram.sum:g}")
+                lines.append(f"{series(name + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def json_lines(self) -> str:
+        return "".join(json.dumps(span, default=str) + "\n" for span in self.recent_spans())
+
+
+registry = Metrics()
+
+span = registry.span
+inc = registry.inc
+set_gauge = registry.set_gauge
+observe = registry.observe
+record_usage = registry.record_usage
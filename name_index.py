@@ -0,0 +1,182 @@
+"""
+In-memory name index for the Complete tab's contact picker.
+
+Keeps three structures in step with the contact store:
+- normalized name -> row ids (exact lookup, duplicate detection)
+- a sorted list of (name token, id) for prefix / type-ahead search
+- trigram -> row ids for fuzzy matches ("jon smth" still finds "John Smith")
+
+It subscribes to the store, so every add, edit or delete from Capture,
+Curate or a background job updates only the affected entries.
+"""
+import bisect
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from contact_store import DELETE
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Casefold, strip accents and punctuation, collapse whitespace: "  Zoë O'Neil " -> "zoe oneil".
+    """
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = _NON_WORD.sub("", name.casefold())
+    return _SPACES.sub(" ", name).strip()
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    def __init__(self, store=None):
+        self._store = store
+        self._lock = threading.RLock()
+        self._names = {}                      # id -> display name
+        self._normalized = {}                 # id -> normalized name
+        self._by_name = defaultdict(set)      # normalized name -> ids
+        self._ordered = []                    # sorted (normalized name, id)
+        self._tokens = []                     # sorted (token, id)
+        self._trigrams = defaultdict(set)     # trigram -> ids
+
+    @classmethod
+    def from_store(cls, store):
+        index = cls(store)
+        seq = store.last_change()
+        for contact_id, name in store.names():
+            index.add(contact_id, name)
+        store.subscribe(index.on_store_change)
+        store.replay(index.on_store_change, seq)
+        return index
+
+    def __len__(self):
+        return len(self._names)
+
+    # -------------------------------------------------------------------------
+    # Maintenance
+    # -------------------------------------------------------------------------
+    def add(self, contact_id: int, name: str):
+        with self._lock:
+            if contact_id in self._names:
+                if self._names[contact_id] == name:
+                    return
+                self.remove(contact_id)
+            normalized = normalize_name(name)
+            self._names[contact_id] = name
+            self._normalized[contact_id] = normalized
+            self._by_name[normalized].add(contact_id)
+            bisect.insort(self._ordered, (normalized, contact_id))
+            for token in set(normalized.split()):
+                bisect.insort(self._tokens, (token, contact_id))
+            for gram in trigrams(normalized):
+                self._trigrams[gram].add(contact_id)
+
+    def remove(self, contact_id: int):
+        with self._lock:
+            if contact_id not in self._names:
+                return
+            normalized = self._normalized.pop(contact_id)
+            del self._names[contact_id]
+            self._discard(self._by_name, normalized, contact_id)
+            self._remove_sorted(self._ordered, (normalized, contact_id))
+            for token in set(normalized.split()):
+                self._remove_sorted(self._tokens, (token, contact_id))
+            for gram in trigrams(normalized):
+                self._discard(self._trigrams, gram, contact_id)
+
+    def on_store_change(self, op: str, ids: list):
+        if op == DELETE:
+            for contact_id in ids:
+                self.remove(contact_id)
+            return
+        # Only the names of the changed rows are fetched
+        for contact_id, name in self._store.names(ids):
+            self.add(contact_id, name)
+
+    @staticmethod
+    def _remove_sorted(entries: list, entry: tuple):
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    @staticmethod
+    def _discard(mapping: dict, key, contact_id: int):
+        ids = mapping.get(key)
+        if ids is not None:
+            ids.discard(contact_id)
+            if not ids:
+                del mapping[key]
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+    def name(self, contact_id: int) -> str:
+        return self._names.get(contact_id, "")
+
+    def lookup(self, name: str) -> list:
+        """
+        Ids of every contact whose normalized name equals `name`'s.
+        """
+        with self._lock:
+            return sorted(self._by_name.get(normalize_name(name), ()))
+
+    def is_duplicate(self, contact_id: int) -> bool:
+        with self._lock:
+            return len(self._by_name.get(self._normalized.get(contact_id), ())) > 1
+
+    def label(self, contact_id: int) -> str:
+        """
+        Display label; duplicate names get their row id appended so they can be told apart.
+        """
+        name = self.name(contact_id) or "(no name)"
+        return f"{name} (#{contact_id})" if self.is_duplicate(contact_id) else name
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """
+        Type-ahead search: exact matches first, then contacts with a name token
+        starting with every query token, then fuzzy trigram matches.
+        """
+        normalized = normalize_name(query)
+        with self._lock:
+            if not normalized:
+                return [contact_id for _, contact_id in self._ordered[:limit]]
+
+            results = list(sorted(self._by_name.get(normalized, ())))
+            seen = set(results)
+
+            prefix_ids = None
+            for token in normalized.split():
+                matches = set()
+                position = bisect.bisect_left(self._tokens, (token,))
+                while position < len(self._tokens) and self._tokens[position][0].startswith(token):
+                    matches.add(self._tokens[position][1])
+                    position += 1
+                prefix_ids = matches if prefix_ids is None else prefix_ids & matches
+            for contact_id in sorted(prefix_ids or (), key=lambda contact_id: self._normalized[contact_id]):
+                if contact_id not in seen:
+                    results.append(contact_id)
+                    seen.add(contact_id)
+            if len(results) >= limit:
+                return results[:limit]
+
+            query_grams = trigrams(normalized)
+            scores = Counter()
+            for gram in query_grams:
+                for contact_id in self._trigrams.get(gram, ()):
+                    scores[contact_id] += 1
+            threshold = max(2, len(query_grams) // 3)
+            for contact_id, score in scores.most_common():
+                if score < threshold or len(results) >= limit:
+                    break
+                if contact_id not in seen:
+                    results.append(contact_id)
+                    seen.add(contact_id)
+            return results[:limit]
@@ -0,0 +1,215 @@
+"""
+Audio-to-profile pipeline: transcribe a voice note, extract the profile fields
+and write the resulting row to the contact store.
+
+Nothing in here touches Streamlit, so the same code path is used by the
+Capture tab and by bulk ingestion.
+"""
+import contextlib
+
+from pydantic import BaseModel, ValidationError
+
+import history
+import metrics
+from ai_cache import audio_key, prompt_key
+from transcription import make_transcriber
+
+# Structured outputs (a JSON-schema response_format) need gpt-4o-mini or newer
+EXTRACTION_MODEL = "gpt-4o-mini"
+
+EXTRACTION_SYSTEM_PROMPT = "You are a helpful assistant that extracts information from text."
+EXTRACTION_PROMPT = """The text below is a voice note and may describe one or several people.
+                            For every person it describes, extract:
+                            - name
+                            - last_recommendation
+                            - other_interesting_items
+
+                            Use an empty string for anything the note does not say.
+
+                            Text: {transcript_text}
+                            """
+
+EMPTY_EXTRACTION = {
+    "Name": "",
+    "last_recommendation": "",
+    "other_interesting_items": "",
+}
+
+
+# -----------------------------------------------------------------------------
+# Models for structured output
+# -----------------------------------------------------------------------------
+class ContentFormat(BaseModel):
+    name: str
+    last_recommendation: str
+    other_interesting_items: str
+
+
+class PeopleFormat(BaseModel):
+    people: list[ContentFormat]
+
+
+# -----------------------------------------------------------------------------
+# Pipeline stages
+# -----------------------------------------------------------------------------
+def no_stage(name: str):
+    return contextlib.nullcontext()
+
+
+def transcribe_audio(client, audio_bytes: bytes, filename: str = "voice_note.wav", cache=None,
+                     transcriber=None) -> str:
+    """
+    Transcribe with `transcriber`, by default the backend configured for `client`
+    (see transcription.make_transcriber). With a PipelineCache, identical audio
+    is only ever transcribed once.
+    """
+    metrics.observe("audio_bytes", len(audio_bytes), buckets=metrics.SIZE_BUCKETS)
+    with metrics.span("transcribe") as attrs:
+        attrs["audio_bytes"] = len(audio_bytes)
+        key = audio_key(audio_bytes) if cache is not None else None
+        if key is not None:
+            cached = cache.transcripts.get(key)
+            metrics.inc("cache_lookups_total", cache="transcripts", result="miss" if cached is None else "hit")
+            if cached is not None:
+                attrs["cache_hit"] = True
+                attrs["transcript_chars"] = len(cached)
+                return cached
+
+        transcriber = transcriber or make_transcriber(client)
+        transcript_text = transcriber.transcribe(audio_bytes, filename)
+        attrs.update(cache_hit=False, backend=transcriber.name, transcript_chars=len(transcript_text or ""))
+        if key is not None:
+            cache.transcripts.set(key, transcript_text)
+        return transcript_text
+
+
+def extract_people(client, transcript_text: str, cache=None):
+    """
+    Ask the chat model for everyone described in the transcript, using
+    PeopleFormat as the structured-output schema. Returns a list of extraction
+    dicts ("Name", "last_recommendation", "other_interesting_items"), or None if
+    the answer did not validate. Only valid answers are cached.
+    """
+    with metrics.span("extract", model=EXTRACTION_MODEL) as attrs:
+        attrs["transcript_chars"] = len(transcript_text or "")
+        key = None
+        if cache is not None:
+            key = prompt_key(transcript_text, EXTRACTION_SYSTEM_PROMPT + EXTRACTION_PROMPT, EXTRACTION_MODEL)
+            cached = cache.extractions.get(key)
+            metrics.inc("cache_lookups_total", cache="extractions", result="miss" if cached is None else "hit")
+            if cached is not None:
+                attrs["cache_hit"] = True
+                return parse_people(cached)
+
+        with metrics.span("openai_request", endpoint="chat.completions", model=EXTRACTION_MODEL):
+            analysis_response = client.chat.completions.parse(
+                model=EXTRACTION_MODEL,
+                messages=[
+                    {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": EXTRACTION_PROMPT.format(transcript_text=transcript_text)}
+                ],
+                response_format=PeopleFormat
+            )
+        attrs["cache_hit"] = False
+        attrs.update(metrics.record_usage(EXTRACTION_MODEL, analysis_response.usage))
+        parsed = analysis_response.choices[0].message.parsed
+        if parsed is None:
+            # Refusal or an answer that does not fit the schema
+            return None
+        people = [extraction_from_content(person) for person in parsed.people]
+        attrs["people"] = len(people)
+        if key is not None:
+            cache.extractions.set(key, parsed.model_dump_json())
+        return people
+
+
+def extraction_from_content(person: ContentFormat) -> dict:
+    return {
+        "Name": person.name,
+        "last_recommendation": person.last_recommendation,
+        "other_interesting_items": person.other_interesting_items,
+    }
+
+
+def parse_people(people_json_str: str):
+    """
+    Validate a PeopleFormat JSON answer. Returns a list of extraction dicts, or None.
+    """
+    try:
+        parsed = PeopleFormat.model_validate_json(people_json_str)
+    except (TypeError, ValidationError):
+        return None
+    return [extraction_from_content(person) for person in parsed.people]
+
+
+def row_from_extraction(analysis_json: dict) -> dict:
+    return {
+        "Name": analysis_json.get("Name", ""),
+        "last_recommendation": analysis_json.get("last_recommendation", ""),
+        "other_interesting_items": analysis_json.get("other_interesting_items", ""),
+        "analysis_json": analysis_json,
+    }
+
+
+class ProcessResult:
+    def __init__(self, transcript_text: str, rows: list, parsed: bool, contact_ids: list = None, merged: int = 0):
+        self.transcript_text = transcript_text
+        self.rows = rows
+        self.parsed = parsed
+        self.contact_ids = contact_ids or []
+        self.merged = merged
+
+
+# -----------------------------------------------------------------------------
+# People class for processing
+# -----------------------------------------------------------------------------
+class People:
+    @staticmethod
+    def process_audio_and_add_row(audio_bytes: bytes, client, store, writer=None, stage=no_stage,
+                                  cache=None, resolver=None, filename: str = "voice_note.wav",
+                                  transcriber=None) -> ProcessResult:
+        """
+        1) Transcribes the audio with `transcriber` (default: the configured backend).
+        2) Extracts Name, last_recommendation and other_interesting_items for every
+           person in the note, in one structured-output call.
+        3) Writes the rows to the store in one transaction, or buffers them on
+           `writer` (an ingest.BatchWriter) for bulk loads.
+
+        `stage(name)` must return a context manager; it is entered around each stage
+        so callers can show spinners or report progress. `cache` is an optional
+        ai_cache.PipelineCache; re-processing an identical note then makes no API calls.
+        With a dedupe.Resolver each row is merged into a matching existing contact.
+        `filename` tells Whisper the format (see audio_prep.prepare_audio).
+        Every stage is also timed through metrics.span.
+        """
+        with metrics.span("process_audio") as attrs:
+            with stage("transcribing"):
+                transcript_text = transcribe_audio(
+                    client, audio_bytes, filename=filename, cache=cache, transcriber=transcriber
+                )
+
+            with stage("analyzing"):
+                people = extract_people(client, transcript_text, cache=cache)
+                parsed = bool(people)
+                if not parsed:
+                    people = [dict(EMPTY_EXTRACTION)]
+                    metrics.inc("extraction_parse_failures_total")
+
+            rows = [row_from_extraction(person) for person in people]
+            contact_ids, merged = [], 0
+            if writer is not None:
+                with metrics.span("store_write", mode="buffered"):
+                    writer.extend(rows)
+            elif resolver is not None and parsed:
+                with metrics.span("store_write", mode="resolve"):
+                    contact_ids, merged = resolver.upsert_many(rows)
+            else:
+                with metrics.span("store_write", mode="insert"):
+                    contact_ids = store.apply_changes(added=rows)
+            # Buffered bulk loads skip the per-contact history; everything else logs the note
+            history.record_captures(store, [
+                (contact_id, transcript_text, dict(person, source_file=filename))
+                for contact_id, person in zip(contact_ids, people)
+            ])
+            attrs.update(audio_bytes=len(audio_bytes), parsed=parsed, people=len(rows), merged=merged)
+            return ProcessResult(transcript_text, rows, parsed, contact_ids, merged)
@@ -0,0 +1,166 @@
+"""
+Offline precomputation of next-step suggestions for the whole contact base.
+
+Finds every contact whose profile changed since its suggestions were last
+generated (or that has none), sends them to the chat model many contacts per
+request, and stores the results next to each contact. Every batch is
+committed as soon as it comes back, so an interrupted run simply resumes with
+the contacts that are still due. The Complete tab then renders stored
+suggestions instantly and only calls the API live for stale contacts.
+
+    python precompute.py --batch-size 20 --concurrency 2
+    python precompute.py --db forget_me_not.db --limit 500
+
+Schedule it (cron, a CI job, ...) or call precompute_suggestions() directly.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel
+
+import history
+import metrics
+from scheduler import background
+from suggestions import SUGGESTION_PROMPT_VERSION, SUGGESTION_SYSTEM_PROMPT, interests_hash
+
+# Structured outputs need gpt-4o-mini or newer
+BATCH_SUGGESTION_MODEL = "gpt-4o-mini"
+BATCH_SUGGESTION_PROMPT = """Below are numbered people, each with their interests or background.
+For every person, provide 2-4 suggested actions or next steps I could take with or for them.
+Return one entry per person, with the person's number and a list of short suggestions.
+
+{numbered_people}
+"""
+
+
+class PersonSuggestions(BaseModel):
+    number: int
+    suggestions: list[str]
+
+
+class SuggestionBatchFormat(BaseModel):
+    people: list[PersonSuggestions]
+
+
+def suggest_batch(client, contacts: list) -> dict:
+    """
+    Suggestions for several contacts from one structured-output call: {contact id: [suggestions]}.
+    Contacts the answer leaves out are missing from the result.
+    """
+    numbered = "\n\n".join(
+        f"Person {n + 1}: {contact.get('other_interesting_items') or 'nothing known yet'}"
+        for n, contact in enumerate(contacts)
+    )
+    with metrics.span("suggest_batch", model=BATCH_SUGGESTION_MODEL) as attrs:
+        attrs["contacts"] = len(contacts)
+        with metrics.span("openai_request", endpoint="chat.completions", model=BATCH_SUGGESTION_MODEL):
+            response = client.chat.completions.parse(
+                model=BATCH_SUGGESTION_MODEL,
+                messages=[
+                    {"role": "system", "content": SUGGESTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": BATCH_SUGGESTION_PROMPT.format(numbered_people=numbered)},
+                ],
+                response_format=SuggestionBatchFormat
+            )
+        attrs.update(metrics.record_usage(BATCH_SUGGESTION_MODEL, response.usage))
+    parsed = response.choices[0].message.parsed
+    results = {}
+    for person in parsed.people if parsed is not None else []:
+        if 1 <= person.number <= len(contacts) and person.suggestions:
+            results[contacts[person.number - 1]["id"]] = [str(suggestion) for suggestion in person.suggestions]
+    return results
+
+
+def precompute_suggestions(store, client, batch_size: int = 20, concurrency: int = 2,
+                           limit: int = None, progress=None) -> dict:
+    """
+    Generate and store suggestions for every contact that is due. `progress(done, total)`
+    is called after each batch. Returns counts of what happened. The calls are
+    queued as background work, behind anything a user is waiting for, and paced
+    by the scheduler's rate limits (OPENAI_RPM / OPENAI_RATE_LIMITS).
+    """
+    client = background(client)
+    # Stamped with the time the profiles were read: a contact edited while we
+    # work on it stays due for the next run.
+    read_at = time.time()
+    due = store.suggestions_due(SUGGESTION_PROMPT_VERSION, limit=limit)
+
+    # Profiles whose interests did not actually change keep their suggestions
+    unchanged, pending = [], []
+    for contact in due:
+        entry = store.get_suggestions(contact["id"])
+        current_hash = interests_hash(contact["other_interesting_items"])
+        if entry is not None and entry["prompt_version"] == SUGGESTION_PROMPT_VERSION \
+                and entry["interests_hash"] == current_hash:
+            unchanged.append((contact["id"], current_hash, SUGGESTION_PROMPT_VERSION, entry["suggestions"], read_at))
+        else:
+            pending.append(contact)
+    store.set_suggestions(unchanged)
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    counts = {"due": len(due), "unchanged": len(unchanged), "generated": 0, "failed": 0, "requests": 0}
+    lock = threading.Lock()
+
+    def run_batch(batch):
+        try:
+            results = suggest_batch(client, batch)
+        except Exception as e:
+            metrics.inc("precompute_batch_failures_total", error=type(e).__name__)
+            results = {}
+        store.set_suggestions([
+            (contact["id"], interests_hash(contact["other_interesting_items"]), SUGGESTION_PROMPT_VERSION,
+             results[contact["id"]], read_at)
+            for contact in batch if contact["id"] in results
+        ])
+        # Only fresh suggestions go in the history, not the re-stamped unchanged ones
+        history.record_suggestions(store, results)
+        with lock:
+            counts["requests"] += 1
+            counts["generated"] += len(results)
+            counts["failed"] += len(batch) - len(results)
+            done = counts["generated"] + counts["failed"]
+        if progress is not None:
+            progress(done, len(pending))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run_batch, batches))
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute next-step suggestions for every contact that changed.")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="Defaults to $OPENAI_API_KEY")
+    parser.add_argument("--db", default=None, help="SQLite contact store (defaults to the app's store)")
+    parser.add_argument("--batch-size", type=int, default=20, help="Contacts per chat call")
+    parser.add_argument("--concurrency", type=int, default=2, help="Chat calls in flight at once")
+    parser.add_argument("--limit", type=int, default=None, help="Only process this many due contacts")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("an OpenAI API key is required (--api-key or $OPENAI_API_KEY)")
+
+    from clients import get_client
+    from contact_store import ContactStore
+
+    store = ContactStore(args.db) if args.db else ContactStore()
+    started = time.perf_counter()
+    counts = precompute_suggestions(
+        store,
+        get_client(args.api_key),
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        limit=args.limit,
+        progress=lambda done, total: print(f"  {done}/{total} contacts", file=sys.stderr),
+    )
+    elapsed = time.perf_counter() - started
+    print(f"{counts['due']} contacts due: {counts['generated']} generated, {counts['unchanged']} unchanged, "
+          f"{counts['failed']} failed, in {counts['requests']} requests ({elapsed:.1f}s)")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Process-wide resources shared by every session and tab: the contact store and
+the caches, indexes and job queue built on it.
+
+Each getter is an st.cache_resource, so it runs once per process. Their
+modules are imported inside the getters, so a tab only pays for what it uses.
+"""
+import streamlit as st
+
+from contact_store import ContactStore
+
+INITIAL_DATA = [
+    {
+        "Name": "Alice",
+        "last_recommendation": "Catch up over coffee next week",
+        "other_interesting_items": "Tech startup founder, loves painting",
+        "analysis_json": {}
+    },
+    {
+        "Name": "Bob",
+        "last_recommendation": "Try the new sushi restaurant in town",
+        "other_interesting_items": "Enjoys rock climbing, big football fan",
+        "analysis_json": {}
+    },
+    {
+        "Name": "Charlie",
+        "last_recommendation": "Book recommendation: 'Atomic Habits'",
+        "other_interesting_items": "Recently moved to LA, into photography",
+        "analysis_json": {}
+    },
+    {
+        "Name": "Diana",
+        "last_recommendation": "Invite to weekend beach trip",
+        "other_interesting_items": "Dog lover, musician",
+        "analysis_json": {}
+    },
+    {
+        "Name": "Ethan",
+        "last_recommendation": "Suggest a local hackathon event",
+        "other_interesting_items": "Self-taught programmer, coffee connoisseur",
+        "analysis_json": {}
+    },
+    {
+        "Name":"Owen",
+        "last_recommendation": "The Great Gatsby",
+        "other_interesting_items": "Arsenal football club, building companies to unicorn status",
+        "analysis_json": {}
+    }
+]
+
+
+# The store is shared by every session in this process (one SQLite file on disk),
+# so contacts survive restarts and are not copied into each session.
+@st.cache_resource
+def get_store():
+    store = ContactStore()
+    store.seed(INITIAL_DATA)
+    # Other replicas write to the same file; pass their changes on to our indexes
+    store.follow()
+    return store
+
+
+# Transcripts and extractions are cached per process, on disk as well as in memory
+@st.cache_resource
+def get_pipeline_cache():
+    from ai_cache import PipelineCache
+
+    return PipelineCache()
+
+
+# Matches new profiles against existing contacts so duplicates are merged on ingestion
+@st.cache_resource
+def get_resolver():
+    from dedupe import Resolver
+
+    return Resolver.from_store(get_store())
+
+
+# Voice notes are processed by a background pool shared by every session
+@st.cache_resource
+def get_job_queue():
+    from jobs import JobQueue
+
+    return JobQueue(get_store(), cache=get_pipeline_cache(), resolver=get_resolver())
+
+
+# Name lookup / type-ahead index for the Complete tab, kept in step with the store
+@st.cache_resource
+def get_name_index():
+    from name_index import NameIndex
+
+    return NameIndex.from_store(get_store())
+
+
+# Embeddings of everyone's interests for "who would like this?" search
+@st.cache_resource
+def get_embedding_index():
+    from embeddings import EmbeddingIndex, HashingEmbedder
+
+    return EmbeddingIndex.from_store(get_store(), HashingEmbedder())
+
+
+# Which trigger rules (tickets, bookings, ...) apply to whom, kept in step with the store
+@st.cache_resource
+def get_trigger_index():
+    from triggers import TriggerIndex
+
+    return TriggerIndex.from_store(get_store())
+
+
+# Complete-tab suggestions, shared by all sessions until they expire
+@st.cache_resource
+def get_suggestion_cache():
+    from suggestions import new_suggestion_cache
+
+    return new_suggestion_cache()
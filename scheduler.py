@@ -0,0 +1,413 @@
+"""
+One scheduler in front of all OpenAI traffic.
+
+Every client from clients.get_client is wrapped in a ScheduledClient, so
+transcriptions, chat calls and embeddings all go through Scheduler.call:
+
+    token buckets   requests and tokens per minute, per API key and model; a call waits
+                    until both buckets cover it (token cost is estimated from
+                    the prompt and settled against the response's usage)
+    priorities      INTERACTIVE calls are served before queued BACKGROUND ones,
+                    and background calls may not dip into the last
+                    INTERACTIVE_RESERVE of a bucket, so a bulk job never leaves
+                    a user waiting for capacity
+    retries         rate limits and transient errors are retried with jittered
+                    exponential backoff, never sooner than the server's Retry-After;
+                    a 429 pauses that key's model for all its callers
+    coalescing      identical requests already in flight (same API key, endpoint,
+                    arguments and priority) share one API call
+    metrics         openai_queue_depth gauge and openai_queue_wait_seconds
+                    histogram per model and priority, openai_retries_total,
+                    openai_coalesced_total
+
+Bulk jobs mark their client with background(client). Limits come from the
+environment:
+
+    OPENAI_RPM                  requests per minute per model (default 500)
+    OPENAI_TPM                  tokens per minute per model (default 200000)
+    OPENAI_RATE_LIMITS          per-model overrides, e.g. "whisper-1=50,gpt-4o-mini=500/200000"
+    OPENAI_INTERACTIVE_RESERVE  share of each bucket kept for interactive calls (default 0.2)
+    OPENAI_MAX_RETRIES          retries per call (default 4)
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+DEFAULT_RPM = float(os.environ.get("OPENAI_RPM", "500"))
+DEFAULT_TPM = float(os.environ.get("OPENAI_TPM", "200000"))
+INTERACTIVE_RESERVE = float(os.environ.get("OPENAI_INTERACTIVE_RESERVE", "0.2"))
+MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "4"))
+BASE_DELAY = 0.5
+MAX_DELAY = 30.0
+# Completion tokens assumed for a chat call until its usage says otherwise
+EXPECTED_COMPLETION_TOKENS = 500
+
+RETRYABLE_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+
+def parse_limits(text: str) -> dict:
+    """
+    "model=rpm[/tpm],..." -> {model: (rpm, tpm or None)}.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        model, _, values = item.partition("=")
+        rpm, _, tpm = values.partition("/")
+        limits[model.strip()] = (float(rpm), float(tpm) if tpm else None)
+    return limits
+
+
+MODEL_LIMITS = parse_limits(os.environ.get("OPENAI_RATE_LIMITS", ""))
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Rate limits, timeouts and transient server/connection errors.
+    """
+    status_code = getattr(error, "status_code", None)
+    if status_code in RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in ("RateLimitError", "APIConnectionError", "APITimeoutError")
+
+
+def retry_after(error: Exception) -> float:
+    """
+    Seconds the server asked us to wait (Retry-After / retry-after-ms), or 0.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return 0.0
+
+
+def estimate_tokens(endpoint: str, kwargs: dict) -> int:
+    """
+    Rough token cost of a request (about four characters per token), for the token bucket.
+    """
+    if endpoint == "chat.completions":
+        chars = sum(len(str(message.get("content") or "")) for message in kwargs.get("messages", []))
+        return chars // 4 + (kwargs.get("max_tokens") or EXPECTED_COMPLETION_TOKENS)
+    if endpoint == "embeddings":
+        texts = kwargs.get("input")
+        return sum(len(text) for text in ([texts] if isinstance(texts, str) else texts or [])) // 4
+    return 0
+
+
+def _key_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha256(value).hexdigest()
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    return repr(value)
+
+
+def account_key(client) -> str:
+    """
+    Identity of the account a client calls as: its API key and base URL, hashed.
+    """
+    identity = f"{getattr(client, 'base_url', '') or ''}\0{getattr(client, 'api_key', '') or ''}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def request_key(account: str, endpoint: str, priority: int, kwargs: dict) -> str:
+    payload = json.dumps([account, endpoint, priority, kwargs], sort_keys=True, default=_key_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# Token buckets
+# -----------------------------------------------------------------------------
+class TokenBucket:
+    """
+    Refills at `per_minute` / 60 per second up to a minute's worth. Not
+    thread-safe on its own; the Scheduler guards it.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, reserve: float, now: float) -> float:
+        """
+        Seconds until `amount` can be taken while leaving `reserve` in the bucket.
+        """
+        self._refill(now)
+        # A request bigger than the bucket goes once the bucket is full, and runs into debt
+        needed = min(amount, self.capacity - reserve) + reserve
+        refill = (needed - self.level) / self.rate if self.rate else 0.0
+        return max(0.0, refill, self.paused_until - now)
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def pause(self, seconds: float, now: float):
+        """
+        Take nothing for `seconds`; what is in the bucket stays there.
+        """
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+# -----------------------------------------------------------------------------
+# Scheduler
+# -----------------------------------------------------------------------------
+class Scheduler:
+    def __init__(self, limits: dict = None, default_rpm: float = DEFAULT_RPM, default_tpm: float = DEFAULT_TPM,
+                 reserve: float = INTERACTIVE_RESERVE, max_retries: int = MAX_RETRIES):
+        self.limits = MODEL_LIMITS if limits is None else limits
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        # Each account (API key) has its own limits with OpenAI, so everything is kept per
+        # (account, model): one user's rate limit never holds up another's calls
+        self._buckets = {}      # (account, model) -> (requests bucket, tokens bucket or None)
+        self._queues = {}       # (account, model) -> heap of (priority, ticket)
+        self._tickets = itertools.count()
+        self._in_flight = {}    # request key -> Future shared by identical calls
+        self._in_flight_lock = threading.Lock()
+
+    def _model_buckets(self, account: str, model: str) -> tuple:
+        buckets = self._buckets.get((account, model))
+        if buckets is None:
+            rpm, tpm = self.limits.get(model, (self.default_rpm, self.default_tpm))
+            buckets = self._buckets[(account, model)] = (TokenBucket(rpm), TokenBucket(tpm) if tpm else None)
+        return buckets
+
+    def queue_depth(self, model: str) -> int:
+        """
+        Calls to `model` (for any account) waiting for their turn right now.
+        """
+        with self._cond:
+            return sum(len(queue) for (_, queue_model), queue in self._queues.items() if queue_model == model)
+
+    def _report_depth(self, model: str):
+        entries = [entry for (_, queue_model), queue in self._queues.items() if queue_model == model for entry in queue]
+        for priority, name in PRIORITY_NAMES.items():
+            depth = sum(1 for entry in entries if entry[0] == priority)
+            metrics.set_gauge("openai_queue_depth", depth, model=model, priority=name)
+
+    def acquire(self, model: str, tokens: int = 0, priority: int = INTERACTIVE, account: str = ""):
+        """
+        Block until it is this call's turn and the account's buckets for `model` cover
+        one request and `tokens` tokens. Calls are served by priority, then in arrival order.
+        """
+        entry = (priority, next(self._tickets))
+        started = time.monotonic()
+        with self._cond:
+            requests, token_bucket = self._model_buckets(account, model)
+            queue = self._queues.setdefault((account, model), [])
+            heapq.heappush(queue, entry)
+            self._report_depth(model)
+            try:
+                while True:
+                    timeout = None
+                    if queue[0] == entry:
+                        now = time.monotonic()
+                        share = self.reserve if priority != INTERACTIVE else 0.0
+                        timeout = requests.wait_time(1, requests.capacity * share, now)
+                        if token_bucket is not None and tokens:
+                            timeout = max(timeout, token_bucket.wait_time(tokens, token_bucket.capacity * share, now))
+                        if timeout <= 0:
+                            requests.take(1)
+                            if token_bucket is not None:
+                                token_bucket.take(tokens)
+                            break
+                    self._cond.wait(timeout)
+            finally:
+                queue.remove(entry)
+                heapq.heapify(queue)
+                self._report_depth(model)
+                self._cond.notify_all()
+        metrics.observe("openai_queue_wait_seconds", time.monotonic() - started,
+                        model=model, priority=PRIORITY_NAMES[priority])
+
+    def settle(self, model: str, estimated: int, usage, account: str = ""):
+        """
+        Correct the token bucket by the difference between the estimate and the real usage.
+        """
+        actual = getattr(usage, "total_tokens", None)
+        if actual is None or not estimated:
+            return
+        with self._cond:
+            token_bucket = self._model_buckets(account, model)[1]
+            if token_bucket is not None:
+                token_bucket.take(actual - estimated)
+            self._cond.notify_all()
+
+    def pause(self, model: str, seconds: float, account: str = ""):
+        """
+        Hold every call the account makes to `model` for `seconds` (after a rate limit).
+        """
+        with self._cond:
+            now = time.monotonic()
+            for bucket in self._model_buckets(account, model):
+                if bucket is not None:
+                    bucket.pause(seconds, now)
+            self._cond.notify_all()
+
+    def call(self, endpoint: str, fn, priority: int = INTERACTIVE, retries: int = None, account: str = "",
+             **kwargs):
+        """
+        fn(**kwargs) once the account's limits for the model allow it, retried with
+        jittered backoff. Identical calls the same account already has in flight wait
+        for that call's result instead (streams are never shared).
+        """
+        if kwargs.get("stream"):
+            return self._call(endpoint, fn, priority, retries, account, kwargs)
+        key = request_key(account, endpoint, priority, kwargs)
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            metrics.inc("openai_coalesced_total", endpoint=endpoint)
+            return future.result()
+        try:
+            result = self._call(endpoint, fn, priority, retries, account, kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+    def _call(self, endpoint: str, fn, priority: int, retries: int, account: str, kwargs: dict):
+        model = kwargs.get("model", "")
+        tokens = estimate_tokens(endpoint, kwargs)
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            self.acquire(model, tokens, priority, account)
+            try:
+                response = fn(**kwargs)
+            except Exception as e:
+                backoff = min(MAX_DELAY, BASE_DELAY * 2 ** attempt)
+                wait = retry_after(e)
+                if getattr(e, "status_code", None) == 429 or type(e).__name__ == "RateLimitError":
+                    # The limit is the account's: hold all its calls to this model, not just ours
+                    self.pause(model, wait or backoff / 2, account)
+                if attempt == retries or not is_retryable(e):
+                    raise
+                metrics.inc("openai_retries_total", error=type(e).__name__)
+                # Never sooner than the server asked; jittered on top so callers that
+                # failed together do not retry together
+                if wait:
+                    time.sleep(wait + random.uniform(0, min(wait, backoff) / 2))
+                else:
+                    time.sleep(backoff / 2 + random.uniform(0, backoff / 2))
+                continue
+            self.settle(model, tokens, getattr(response, "usage", None), account)
+            return response
+
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _lock:
+            if _scheduler is None:
+                _scheduler = Scheduler()
+    return _scheduler
+
+
+# -----------------------------------------------------------------------------
+# Client wrapper
+# -----------------------------------------------------------------------------
+# Client methods that go through the scheduler, and the endpoint each one calls
+ROUTES = {
+    ("chat", "completions", "create"): "chat.completions",
+    ("chat", "completions", "parse"): "chat.completions",
+    ("audio", "transcriptions", "create"): "audio.transcriptions",
+    ("embeddings", "create"): "embeddings",
+}
+_PREFIXES = {route[:n] for route in ROUTES for n in range(1, len(route))}
+
+
+class _Scheduled:
+    def __init__(self, target, scheduler: Scheduler, priority: int, retries: int, account: str, path: tuple = ()):
+        self._target = target
+        self._scheduler = scheduler
+        self._priority = priority
+        self._retries = retries
+        self._account = account
+        self._path = path
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        path = self._path + (name,)
+        if path in ROUTES:
+            endpoint = ROUTES[path]
+            scheduler, priority, retries, account = self._scheduler, self._priority, self._retries, self._account
+            return lambda **kwargs: scheduler.call(
+                endpoint, attr, priority=priority, retries=retries, account=account, **kwargs
+            )
+        if path in _PREFIXES:
+            return _Scheduled(attr, self._scheduler, self._priority, self._retries, self._account, path)
+        return attr
+
+
+class ScheduledClient(_Scheduled):
+    """
+    An OpenAI client whose API calls go through `scheduler` at `priority`, counted
+    against `account` (by default its API key and base URL, see account_key).
+    Everything else is the wrapped client's own.
+    """
+
+    def __init__(self, client, scheduler: Scheduler = None, priority: int = INTERACTIVE, retries: int = None,
+                 account: str = None):
+        super().__init__(
+            client, scheduler or get_scheduler(), priority, retries, account if account is not None else account_key(client)
+        )
+
+    @property
+    def client(self):
+        return self._target
+
+    def with_priority(self, priority: int) -> "ScheduledClient":
+        return ScheduledClient(self._target, self._scheduler, priority, self._retries, self._account)
+
+    def with_options(self, **options) -> "ScheduledClient":
+        # Retries are the scheduler's job; max_retries sets how many it makes for this client
+        retries = options.pop("max_retries", self._retries)
+        return ScheduledClient(
+            self._target.with_options(**options), self._scheduler, self._priority, retries, self._account
+        )
+
+
+def background(client):
+    """
+    The same client with its calls queued behind interactive ones (clients that
+    are not scheduled, like test doubles, are returned as they are).
+    """
+    return client.with_priority(BACKGROUND) if isinstance(client, ScheduledClient) else client
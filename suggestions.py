@@ -0,0 +1,184 @@
+"""
+Next-step suggestions for the Complete tab.
+
+Suggestions only depend on a contact's interests and the prompt, so results are
+memoized per contact in a TTL cache keyed on (contact id, interests hash,
+prompt version), and stored next to the contact by the precompute batch job.
+Bump SUGGESTION_PROMPT_VERSION whenever the prompt changes.
+"""
+import hashlib
+import json
+import time
+
+import history
+import metrics
+from ai_cache import TTLCache
+
+SUGGESTION_MODEL = "gpt-3.5-turbo"
+SUGGESTION_PROMPT_VERSION = 1
+SUGGESTION_TTL_SECONDS = 6 * 60 * 60
+
+SUGGESTION_SYSTEM_PROMPT = (
+    "You are a helpful assistant. The user wants to figure out meaningful "
+    "or creative next steps to connect with someone based on the person's interests. "
+    "These should be output as suggestions they can do for the person or with the person"
+    "Return your answer as a valid JSON array of short suggestions."
+)
+SUGGESTION_PROMPT = """
+                                The person has the following interests or background:
+                                {interests}
+
+                                Provide 2-4 suggested actions or next steps I could take, in JSON array format only,
+                                e.g. ["Invite them to a painting workshop", "Share interesting tech articles"].
+                                """
+
+
+def interests_hash(interests: str) -> str:
+    return hashlib.sha256((interests or "").encode("utf-8")).hexdigest()
+
+
+def suggestion_key(contact_id: int, interests: str) -> tuple:
+    return (contact_id, interests_hash(interests), SUGGESTION_PROMPT_VERSION)
+
+
+def stored_suggestions(store, contact_id: int, interests: str):
+    """
+    Precomputed suggestions for a contact (see precompute.py), or None if there
+    are none or they were generated for other interests or another prompt version.
+    """
+    entry = store.get_suggestions(contact_id)
+    if entry is None or entry["prompt_version"] != SUGGESTION_PROMPT_VERSION:
+        return None
+    if entry["interests_hash"] != interests_hash(interests):
+        return None
+    return entry["suggestions"]
+
+
+def store_suggestions(store, contact_id: int, interests: str, suggestions: list, generated_at: float = None):
+    store.set_suggestions([(
+        contact_id, interests_hash(interests), SUGGESTION_PROMPT_VERSION, suggestions,
+        generated_at if generated_at is not None else time.time(),
+    )])
+    history.record_suggestions(store, {contact_id: suggestions})
+
+
+def suggestion_messages(interests: str) -> list:
+    return [
+        {"role": "system", "content": SUGGESTION_SYSTEM_PROMPT},
+        {"role": "user", "content": SUGGESTION_PROMPT.format(interests=interests)},
+    ]
+
+
+def generate_suggestions(client, interests: str) -> str:
+    """
+    Ask the chat model for suggestions. Returns the raw response text.
+    """
+    with metrics.span("openai_request", endpoint="chat.completions", model=SUGGESTION_MODEL):
+        response = client.chat.completions.create(
+            model=SUGGESTION_MODEL,
+            messages=suggestion_messages(interests)
+        )
+    metrics.record_usage(SUGGESTION_MODEL, response.usage)
+    return response.choices[0].message.content
+
+
+def parse_suggestions(suggestions_str: str):
+    """
+    Parse a JSON array of suggestions. Returns None if the answer is not one.
+    """
+    try:
+        suggestions = json.loads(suggestions_str)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    if not isinstance(suggestions, list):
+        return None
+    return [str(suggestion) for suggestion in suggestions]
+
+
+def iter_json_array_items(chunks):
+    """
+    Incrementally parse a JSON array arriving in text chunks and yield each
+    top-level element as soon as it is complete. Text before the opening "["
+    (e.g. a code fence) is ignored; malformed elements are skipped.
+    """
+    started = False
+    depth = 0
+    in_string = False
+    escaped = False
+    item = []
+    for chunk in chunks:
+        for char in chunk:
+            if not started:
+                started = char == "["
+                continue
+            if in_string:
+                item.append(char)
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+                continue
+            if depth == 0 and char in ",]":
+                text = "".join(item).strip()
+                item = []
+                if text:
+                    try:
+                        yield json.loads(text)
+                    except json.JSONDecodeError:
+                        pass
+                if char == "]":
+                    return
+                continue
+            if char == '"':
+                in_string = True
+            elif char in "[{":
+                depth += 1
+            elif char in "]}":
+                depth -= 1
+            item.append(char)
+
+
+def stream_suggestions(client, interests: str):
+    """
+    Stream suggestions from the chat model, yielding each one as soon as its
+    JSON array element has fully arrived. The span covers the whole stream and
+    records the time to the first suggestion.
+    """
+    with metrics.span("suggestions", model=SUGGESTION_MODEL) as attrs:
+        started = time.perf_counter()
+        stream = client.chat.completions.create(
+            model=SUGGESTION_MODEL,
+            messages=suggestion_messages(interests),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        def text_chunks():
+            for chunk in stream:
+                if chunk.usage is not None:
+                    attrs.update(metrics.record_usage(SUGGESTION_MODEL, chunk.usage))
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        chunks = text_chunks()
+        count = 0
+        try:
+            for suggestion in iter_json_array_items(chunks):
+                if count == 0:
+                    attrs["first_suggestion_s"] = round(time.perf_counter() - started, 6)
+                    metrics.observe("suggestions_first_item_seconds", time.perf_counter() - started)
+                count += 1
+                yield str(suggestion)
+            # The parser stops at the closing "]"; the usage chunk comes after it
+            for _ in chunks:
+                pass
+        finally:
+            # Release the connection if the caller stopped reading early
+            stream.close()
+        attrs["suggestions"] = count
+
+
+def new_suggestion_cache() -> TTLCache:
+    return TTLCache(ttl_seconds=SUGGESTION_TTL_SECONDS, max_entries=10_000)
@@ -0,0 +1,40 @@
+"""
+One module per tab, each with a render() function. A tab's module (and the
+libraries it needs) is only imported the first time that tab is selected.
+"""
+import importlib
+import sys
+import time
+
+import metrics
+
+TABS = {
+    "Capture": "tabs.capture",
+    "Curate": "tabs.curate",
+    "Complete": "tabs.complete",
+}
+# How often live views check the store's change feed for rows that changed
+LIVE_REFRESH_SECONDS = 3
+
+
+def load(tab: str):
+    """
+    The module for `tab`, importing it on first use (the import time is recorded once).
+    """
+    name = TABS[tab]
+    module = sys.modules.get(name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        metrics.observe("tab_import_seconds", time.perf_counter() - started, tab=tab)
+    return module
+
+
+def render(tab: str):
+    module = load(tab)
+    # Not a metrics.span: st.stop() and st.rerun() end a render by raising, which is no failure
+    started = time.perf_counter()
+    try:
+        module.render()
+    finally:
+        metrics.observe("tab_render_seconds", time.perf_counter() - started, tab=tab)
@@ -0,0 +1,176 @@
+"""
+Capture tab: record or upload voice notes, queue them for processing and
+browse Basil's Brain.
+"""
+import time
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+from audio_prep import prepare_audio
+from clients import get_client
+from jobs import DONE, FINISHED_STATUSES
+from resources import get_job_queue, get_pipeline_cache, get_resolver, get_store
+from tabs.tables import live_contacts_table
+
+
+def render():
+    store = get_store()
+    if "audio_file" not in st.session_state:
+        st.session_state.audio_file = None
+    if "recorder_id" not in st.session_state:
+        st.session_state.recorder_id = 0
+
+    # -- Title (moved inside the "Main" tab)
+    st.title("Basil, Your Connection Assistant")
+    st.write(
+        "Tired of forgetting names as you meet new people?\n"
+        "Never remember the last interactions?\n"
+        "Time to remember... **Forget me not!**"
+    )
+
+    # -----------------------------------------------------------------------------
+    # 1. OpenAI Key Handling
+    # -----------------------------------------------------------------------------
+    # We store the OpenAI key in session_state to remember it throughout app usage
+    if "openai_api_key" not in st.session_state:
+        st.session_state["openai_api_key"] = ""
+
+    st.session_state["openai_api_key"] = st.text_input(
+        "Enter your OpenAI API Key:", 
+        type="password", 
+        value=st.session_state["openai_api_key"]
+    )
+
+    # Use the shared, pooled client for this key if available
+    if st.session_state["openai_api_key"]:
+        client = get_client(st.session_state["openai_api_key"])
+        
+
+    # -------------------------------------------------------------------------
+    # 3.2 Session State for DataFrame
+    # -------------------------------------------------------------------------
+    # if "people_df" not in st.session_state:
+    #     st.session_state.people_df = pd.DataFrame(
+    #         columns=["Name", "last_recommendation", "other_interesting_items", "analysis_json"]
+    #     )
+
+    # -------------------------------------------------------------------------
+    # 3.3 Processing runs in the background job queue (see jobs.py)
+    # -------------------------------------------------------------------------
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if "announced_jobs" not in st.session_state:
+        st.session_state.announced_jobs = set()
+
+    # -------------------------------------------------------------------------
+    # 3.5 UI for uploading/recording audio
+    # -------------------------------------------------------------------------
+    #audio_value = st.file_uploader("Upload or record a voice message", type=["wav", "mp3", "m4a"])
+    
+    audio_value = st.audio_input("Upload or record a voice message", key=f"recorder_{st.session_state.recorder_id}")
+
+    # Decode/trim/compress each recording once; the same buffer is played back
+    # below and uploaded to Whisper
+    prepared_audio = None
+    if audio_value is not None:
+        cached_audio = st.session_state.get("prepared_audio")
+        if cached_audio is None or cached_audio[0] != audio_value.file_id:
+            prepared = prepare_audio(audio_value.getvalue(), audio_value.name or "voice_note.wav")
+            cached_audio = (audio_value.file_id, prepared)
+            st.session_state.prepared_audio = cached_audio
+        prepared_audio = cached_audio[1]
+
+    if st.button("Let Basil listen in"):
+        if not st.session_state["openai_api_key"]:
+            st.error("Please enter a valid OpenAI API Key first.")
+        elif audio_value is None:
+            st.error("Please record or upload a voice message first.")
+        else:
+            get_job_queue().submit(
+                prepared_audio.data,
+                client=client,
+                owner=st.session_state.session_id,
+                label=time.strftime("%H:%M:%S"),
+                filename=prepared_audio.filename
+            )
+            st.toast("Basil is listening in the background - feel free to record the next one!")
+
+    # Bulk mode: many files (or zips of files) at once, imported in one background job
+    with st.expander("Bulk import recordings"):
+        uploads = st.file_uploader(
+            "Upload many voice notes or a zip of them",
+            type=["wav", "mp3", "m4a", "zip"],
+            accept_multiple_files=True
+        )
+        if st.button("Import all") and uploads:
+            if not st.session_state["openai_api_key"]:
+                st.error("Please enter a valid OpenAI API Key first.")
+            else:
+                from bulk_import import bulk_import, expand_uploads
+
+                files = list(expand_uploads((upload.name, upload.getvalue()) for upload in uploads))
+
+                def run_bulk_import(stage, files=files, client=client):
+                    summary = bulk_import(
+                        store, client, files, cache=get_pipeline_cache(), resolver=get_resolver(), stage=stage
+                    )
+                    imported = summary["files"] - len(summary["errors"])
+                    return f"{imported} of {summary['files']} notes imported, {summary['merged']} de-duplicated"
+
+                get_job_queue().submit_task(
+                    run_bulk_import,
+                    owner=st.session_state.session_id,
+                    label=f"Bulk import ({len(files)} files)"
+                )
+                st.toast(f"Importing {len(files)} recordings in the background")
+
+    # Poll this session's jobs; only this fragment reruns while work is in flight
+    @st.fragment(run_every=2)
+    def show_job_status():
+        jobs = get_job_queue().jobs(owner=st.session_state.session_id)
+        if not jobs:
+            return
+        st.write("#### Basil's to-do list")
+        st.dataframe(
+            pd.DataFrame(jobs, columns=["label", "status", "result", "error"]),
+            hide_index=True
+        )
+        newly_finished = [
+            job for job in jobs
+            if job["status"] in FINISHED_STATUSES and job["id"] not in st.session_state.announced_jobs
+        ]
+        if newly_finished:
+            st.session_state.announced_jobs.update(job["id"] for job in newly_finished)
+            for job in newly_finished:
+                if job["status"] == DONE:
+                    st.toast(f"Audio processed and added to brain: {job['result']}")
+                else:
+                    st.toast(f"Processing failed: {job['error']}")
+
+    show_job_status()
+
+    with st.expander("Cache statistics"):
+        st.dataframe(pd.DataFrame(get_pipeline_cache().stats()), hide_index=True)
+        
+
+    # If we have an audio file, display it
+    if prepared_audio is not None:
+        st.audio(prepared_audio.data, format=prepared_audio.mime)
+        st.caption(prepared_audio.summary())
+
+    # -------------------------------------------------------------------------
+    # 3.6 Display the DataFrame
+    # -------------------------------------------------------------------------
+    def clear_recording():
+        # A fresh widget key empties the recorder; the prepared upload goes with it
+        st.session_state.recorder_id += 1
+        st.session_state.pop("prepared_audio", None)
+
+    st.button("Clear All", on_click=clear_recording)
+
+    # Follows the store's change feed: new and edited contacts (from this session,
+    # teammates or other replicas) appear without reloading the page
+    st.write("### Basil's Brain")
+    live_contacts_table("brain")
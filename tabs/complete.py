@@ -0,0 +1,281 @@
+"""
+Complete tab: everything Basil knows and suggests about one contact, what the
+trigger rules can do for everyone, and "who would like this?" search.
+"""
+import json
+import time
+
+import pandas as pd
+import streamlit as st
+
+import history
+from clients import get_client
+from resources import (
+    get_embedding_index,
+    get_job_queue,
+    get_name_index,
+    get_store,
+    get_suggestion_cache,
+    get_trigger_index,
+)
+from suggestions import store_suggestions, stored_suggestions, stream_suggestions, suggestion_key
+from tabs import LIVE_REFRESH_SECONDS
+
+
+# -----------------------------------------------------------------------------
+# Utility function: placeholder for "next football match" search
+# -----------------------------------------------------------------------------
+def find_next_football_match():
+    """
+    Placeholder function to simulate searching the web for the next football match.
+    In a real scenario, you could call an external API, e.g.:
+    - requests.get("https://api.football-data.org/...") 
+    - or any sports data provider
+    """
+    return "Next Premier League match: Arsenal vs. West Ham on 22nd Feb ."
+
+
+# ----------------------------------------------------------------------------
+# Interaction history (see history.py)
+# ----------------------------------------------------------------------------
+def show_interactions(store, contact_id: int, n: int = 5):
+    profile = history.profile(store, contact_id)
+    if not profile["interactions"]:
+        st.write("Nothing logged for this contact yet.")
+        return
+    first = time.strftime("%d %b %Y", time.localtime(profile["first_at"]))
+    st.caption(f"{profile['interactions']} interactions since {first}")
+    for entry in history.recent_interactions(store, contact_id, n):
+        when = time.strftime("%d %b %Y %H:%M", time.localtime(entry["at"]))
+        st.write(f"**{when}** · {entry['kind']} · {entry['text']}")
+
+
+# ----------------------------------------------------------------------------
+# New Helper Function: Find Similar Books
+# ----------------------------------------------------------------------------
+def find_similar_books(book_info: str):
+    """
+    Given a book description or recommendation, call the OpenAI API to suggest similar books.
+    Returns a list of suggested book titles.
+    """
+    if not st.session_state.get("openai_api_key"):
+        st.error("Please go to the 'Capture' tab and enter your OpenAI API key first.")
+        return []
+    client = get_client(st.session_state["openai_api_key"])
+    with st.spinner("Searching for similar books..."):
+        try:
+            response = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant that suggests similar books."},
+                    {"role": "user", "content": f"Based on the following book recommendation or description, suggest similar books that might be of interest: {book_info}. Please return your answer as a JSON array of book titles."}
+                ]
+            )
+            response_str = response.choices[0].message.content
+            try:
+                suggestions = json.loads(response_str)
+            except Exception:
+                suggestions = [response_str]
+        except Exception as e:
+            st.error(f"OpenAI API call failed: {e}")
+            suggestions = []
+    return suggestions
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def watch_contact(contact_id: int, seen_seq: int):
+    changes = get_store().changes_since(seen_seq)
+    if changes is None or contact_id in changes["upserted"] | changes["deleted"]:
+        st.rerun()
+
+
+def render():
+    store = get_store()
+
+    st.title("Basil, Your Connection Assistant")
+
+    # Check if there's any data in the store
+    name_index = get_name_index()
+    if len(name_index):
+        # Type-ahead search over the name index; the dropdown only holds the best matches
+        query = st.text_input("Search contacts", placeholder="Start typing a name...")
+        matches = name_index.search(query, limit=50)
+        if not matches:
+            st.warning("No contacts match that search.")
+            st.stop()
+
+        # Create a dropdown to select a user by their Name (options are row ids)
+        selected_id = st.selectbox(
+            "Select a user",
+            matches,
+            format_func=name_index.label
+        )
+
+        # Fetch just the selected contact, and rerun if anyone changes it while it is shown
+        seen_seq = store.last_change()
+        last_row = store.get(selected_id)
+        if last_row is None:
+            st.warning("That contact was just deleted.")
+            st.stop()
+        watch_contact(selected_id, seen_seq)
+
+        # Create two columns: one for the image, one for the text
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            # Placeholder image (replace URL or logic with your own image if available)
+            st.image("https://t3.ftcdn.net/jpg/05/16/27/58/360_F_516275801_f3Fsp17x6HQK0xQgDQEELoTuERO4SsWV.jpg", #https://via.placeholder.com/150",
+                     caption="Placeholder Image",
+                     use_container_width=True)
+        with col2:
+            # Display Name next to the image
+            st.subheader(last_row["Name"])
+            # Underneath name, display the rest of the information
+            st.write(f"**Last Recommendation:** {last_row['last_recommendation']}")
+            st.write(f"**Other Interesting Items:** {last_row['other_interesting_items']}")
+            st.write("**Next Scheduled Meeting:** *No Meeting in Your Google Calendar*")
+
+        # The compacted profile holds the latest interactions, so this is one row read
+        with st.expander("Last interactions"):
+            show_interactions(store, selected_id)
+
+        # Show a list of suggested actions
+        st.write("### What I think we should do...🤔")
+
+        # Check if we have an OpenAI key
+        if not st.session_state.get("openai_api_key"):
+            st.error("Please go to the 'Capture' tab and enter your OpenAI API key first.")
+        else:
+            # Reuse the shared client (and its warm connections) for this key
+            client = get_client(st.session_state["openai_api_key"])
+
+            # Suggestions precomputed by precompute.py are stored next to the contact and
+            # render at once; otherwise they are cached per contact and interests, so
+            # reruns (theme switch, button clicks) reuse them. "Regenerate" drops both.
+            suggestion_cache = get_suggestion_cache()
+            interests = last_row["other_interesting_items"]
+            cache_key = suggestion_key(selected_id, interests)
+            regenerate = st.button("Regenerate suggestions")
+            if regenerate:
+                suggestion_cache.invalidate(cache_key)
+
+            suggestions = None if regenerate else stored_suggestions(store, selected_id, interests)
+            if suggestions is None:
+                suggestions = suggestion_cache.get(cache_key)
+            if suggestions is not None:
+                # Stored or cached: render at once
+                st.markdown("\n".join("- " + suggestion for suggestion in suggestions))
+            else:
+                # Stream from the API; each suggestion renders as soon as its JSON element completes
+                streamed = []
+
+                def stream_data():
+                    for suggestion in stream_suggestions(client, interests):
+                        streamed.append(suggestion)
+                        yield "- " + suggestion + "\n\n"
+
+                try:
+                    st.write_stream(stream_data)
+                    if streamed:
+                        suggestion_cache.set(cache_key, streamed)
+                        store_suggestions(store, selected_id, interests, streamed)
+                    else:
+                        st.write("Could not parse the suggestions from JSON.")
+                except Exception as e:
+                    st.error(f"OpenAI API call failed: {e}")
+                    st.write("No suggestions due to error.")
+
+            # Batch-generate stored suggestions for every contact whose profile changed
+            if st.button("Precompute suggestions for everyone"):
+                from precompute import precompute_suggestions
+
+                def run_precompute(stage, client=client):
+                    with stage("analyzing"):
+                        counts = precompute_suggestions(store, client)
+                    return f"{counts['generated']} generated, {counts['unchanged']} unchanged, {counts['failed']} failed"
+
+                get_job_queue().submit_task(
+                    run_precompute,
+                    owner=st.session_state.get("session_id"),
+                    label="Precompute suggestions"
+                )
+                st.toast("Precomputing suggestions in the background - progress is on the Capture tab")
+
+            # # If "book" is mentioned in the recommendation or interests, call the new helper function.
+            # if ("book" in last_row["last_recommendation"].lower() or 
+            #     "book" in last_row["other_interesting_items"].lower()):
+            #     st.write("#### Book Detected - Searching for similar books...")
+            #     similar_books = find_similar_books(last_row["last_recommendation"])
+            #     if similar_books:
+            #         st.write("**Similar Books:**")
+            #         for book in similar_books:
+            #             st.write("- " + book)
+
+        # Create two columns for the Execute button and the robot emoji.
+        col_exec, col_emoji = st.columns([2, 1])
+        with col_exec:
+            if st.button("Can I do this for you, Marcel?"):
+                st.success("All tasks completed 🙂, Basil✅")
+                st.session_state.robot_executed = True
+
+                # Actions come from the precomputed trigger index (see triggers.py)
+                for rule in get_trigger_index().actions_for(selected_id):
+                    for message in rule["messages"]:
+                        st.write(message)
+                    if rule["id"] == "football":
+                        next_match = find_next_football_match()  # Placeholder function
+                        st.write(f"**Next match info:** {next_match}")
+                    st.write(rule["done"])
+
+        with col_emoji:
+            if st.session_state.get("Basil has completed you actions!", False):
+                st.write("🤖")
+
+        # Everything the trigger rules suggest, across all contacts at once
+        with st.expander("What can Basil do this week for everyone?"):
+            plan = get_trigger_index().plan()
+            if plan:
+                st.dataframe(
+                    pd.DataFrame(
+                        [
+                            {
+                                "action": rule["action"],
+                                "people": len(contact_ids),
+                                "who": ", ".join(name_index.label(contact_id) for contact_id in contact_ids[:10])
+                                + (", ..." if len(contact_ids) > 10 else ""),
+                            }
+                            for rule, contact_ids in plan
+                        ]
+                    ),
+                    hide_index=True
+                )
+            else:
+                st.write("Nothing to do for anyone right now.")
+
+        # Semantic search over everyone's interests - no LLM call involved
+        st.write("### Who would like this? 🎟️")
+        idea = st.text_input("Describe an event, gift or idea", placeholder="e.g. a jazz gig on Friday")
+        if idea:
+            matches = [
+                (contact_id, score)
+                for contact_id, score in get_embedding_index().who_would_like(idea, k=10)
+                if score > 0
+            ]
+            if matches:
+                people = {row["id"]: row for row in store.get_many([contact_id for contact_id, _ in matches])}
+                st.dataframe(
+                    pd.DataFrame(
+                        [
+                            {
+                                "Name": name_index.label(contact_id),
+                                "other_interesting_items": people[contact_id]["other_interesting_items"],
+                                "match": round(score, 3),
+                            }
+                            for contact_id, score in matches if contact_id in people
+                        ]
+                    ),
+                    hide_index=True
+                )
+            else:
+                st.write("Nobody comes to mind for that one.")
+    else:
+        st.write("No records available. Please add some data first.")
@@ -0,0 +1,140 @@
+"""
+Curate tab: edit Basil's Brain a page at a time and save the changes back to the store.
+"""
+import streamlit as st
+
+import history
+from contact_frame import contacts_frame
+from contact_store import COLUMNS, StaleRowError
+from resources import get_store
+from tabs.tables import analysis_inspector, contacts_page_query, contacts_pager
+
+
+def render():
+    store = get_store()
+
+    st.title("Basil, Your Connection Assistant")
+    # st.write(
+    #     """
+    #     **forget me not** helps you remember important details about the people you meet,
+    #     powered by OpenAI's Whisper (for transcription) and GPT (for text analysis).
+        
+    #     \n\n
+    #     - **Tab 1 (Main):** Record or upload audio, process it, and see extracted info.
+    #     - **Tab 2 (About):** Learn more about this project or add more details here.
+    #     """
+    # )
+    
+    st.write("Peep inside Basil's memory of all your interactions so far... Would you like to add a new connection?")
+
+    # Show the outcome of the last save (the page reruns after saving)
+    notice = st.session_state.pop("curate_notice", None)
+    if notice:
+        getattr(st, notice[0])(notice[1])
+
+    # The editor works on a snapshot of one page of rows (with their version stamps) that
+    # stays fixed until the next save, reload or page change, so its positional change set
+    # maps to row ids. Unsaved edits are dropped when the page, filter or sort changes.
+    if "curate_generation" not in st.session_state:
+        st.session_state.curate_generation = 0
+    generation = st.session_state.curate_generation
+    curate_query, curate_total = contacts_page_query("curate")
+    snapshot_key = (generation, tuple(sorted((name, str(value)) for name, value in curate_query.items())))
+    if st.session_state.get("curate_snapshot", (None,))[0] != snapshot_key:
+        snapshot_seq = store.last_change()
+        st.session_state.curate_snapshot = (
+            snapshot_key,
+            contacts_frame(
+                store.page(**curate_query, decode_analysis=False),
+                with_version=True, columns=curate_query["columns"], editable=True
+            ),
+            snapshot_seq
+        )
+    snapshot_df, snapshot_seq = st.session_state.curate_snapshot[1:]
+    editor_key = f"crm_editor_{abs(hash(snapshot_key))}"
+
+    # -- Display an editable data editor (Streamlit >= 1.22)
+    st.data_editor(
+        snapshot_df,
+        num_rows="dynamic",         # Allow adding new rows
+        use_container_width=True,   # Expand to width of container
+        disabled=["id"],            # Row ids are assigned by the store
+        column_config={"version": None, "analysis_json": None},
+        hide_index=True,
+        key=editor_key
+    )
+    contacts_pager("curate", curate_query, curate_total)
+    analysis_inspector("curate", snapshot_df)
+
+    # Someone else may have changed rows on this page since the snapshot was taken;
+    # saving over them would be refused (versions), so say so before anyone edits them
+    changes = store.changes_since(snapshot_seq)
+    if changes is None:
+        st.info("Contacts may have changed elsewhere since you opened this page. Reload to see the latest.")
+    else:
+        changed_here = (changes["upserted"] | changes["deleted"]) & set(snapshot_df["id"].tolist())
+        if changed_here:
+            st.info(
+                f"{len(changed_here)} of the contacts on this page changed elsewhere since you opened it. "
+                "Reload to see the latest before editing them."
+            )
+
+    col_save, col_reload = st.columns([1, 1])
+    # Save changes (Update) - only the editor's change set is written, row by row
+    with col_save:
+        if st.button("Save Changes"):
+            changes = st.session_state[editor_key]
+            rows = snapshot_df.to_dict("records")
+            deleted = [int(rows[position]["id"]) for position in changes["deleted_rows"]]
+            updates = {}
+            for position, fields in changes["edited_rows"].items():
+                contact_id = int(rows[int(position)]["id"])
+                fields = {column: value for column, value in fields.items() if column in COLUMNS}
+                if contact_id not in deleted and fields:
+                    updates[contact_id] = fields
+            added = [
+                {column: value for column, value in row.items() if column in COLUMNS}
+                for row in changes["added_rows"]
+            ]
+            versions = {int(row["id"]): int(row["version"]) for row in rows}
+            try:
+                store.apply_changes(updates=updates, added=added, deleted=deleted, versions=versions)
+                history.record_edits(store, updates)
+                st.session_state.curate_notice = (
+                    "success",
+                    f"Changes saved to Basil's Brain! ({len(updates)} edited, {len(added)} added, {len(deleted)} deleted)"
+                )
+            except StaleRowError as e:
+                st.session_state.curate_notice = (
+                    "error",
+                    f"Nothing was saved: {e}. The latest data has been reloaded, please re-apply your edits."
+                )
+            st.session_state.curate_generation += 1
+            st.rerun()
+    with col_reload:
+        if st.button("Reload"):
+            st.session_state.curate_generation += 1
+            st.rerun()
+
+    # Merge duplicate profiles across the whole store (blocking keys keep this near-linear)
+    if st.button("De-duplicate all profiles"):
+        from dedupe import dedupe_store
+
+        with st.spinner("Looking for duplicate profiles..."):
+            merged = dedupe_store(store)
+        st.session_state.curate_notice = (
+            "success", f"Merged {merged} duplicate profiles." if merged else "No duplicate profiles found."
+        )
+        st.session_state.curate_generation += 1
+        st.rerun()
+
+    # # -- Delete row(s): let user select by index
+    # if not st.session_state.people_df.empty:
+    #     selected_indices = st.multiselect(
+    #         "Select row indices to delete:",
+    #         st.session_state.people_df.index
+    #     )
+    #     if st.button("Delete Selected Rows"):
+    #         st.session_state.people_df.drop(index=selected_indices, inplace=True)
+    #         st.session_state.people_df.reset_index(drop=True, inplace=True)
+    #         st.success("Selected rows deleted!")
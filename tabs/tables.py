@@ -0,0 +1,152 @@
+"""
+Paged contact tables for the Capture and Curate tabs: only the visible page
+(and columns) is read from the store and sent to the browser.
+
+live_contacts_table() also keeps itself current from the store's change feed,
+so edits from other sessions (or replicas) show up without reloading the page.
+"""
+import pandas as pd
+import streamlit as st
+
+from contact_frame import analysis_at, contacts_frame
+from contact_store import COLUMNS
+from resources import get_store
+from tabs import LIVE_REFRESH_SECONDS
+
+PAGE_SIZES = [25, 50, 100, 250]
+SORT_OPTIONS = {
+    "Name": "Name",
+    "Recently updated": "updated_at",
+    "Date added": "id",
+    "Last recommendation": "last_recommendation",
+    "Interests": "other_interesting_items",
+}
+_FILTERED_COLUMNS = ["Name", "other_interesting_items", "last_recommendation"]
+
+
+def count_contacts(filter_text: str) -> int:
+    """
+    store.count(filter_text), re-counted only when the store has changed since the last call.
+    """
+    store = get_store()
+    key = (filter_text, store.last_change())
+    cached = st.session_state.get("contacts_count")
+    if cached is None or cached[0] != key:
+        cached = (key, store.count(filter_text))
+        st.session_state.contacts_count = cached
+    return cached[1]
+
+
+def contacts_page_query(key: str) -> dict:
+    """
+    Filter, sort and column controls for a contacts table, plus the page picked
+    last run. Returns the arguments for store.page() and the matching total.
+    """
+    page_key = f"{key}_page"
+
+    def first_page():
+        st.session_state[page_key] = 1
+
+    filter_col, sort_col, size_col = st.columns([3, 2, 1])
+    filter_text = filter_col.text_input(
+        "Filter", key=f"{key}_filter", placeholder="Name, interests or recommendation", on_change=first_page
+    )
+    sort_label = sort_col.selectbox("Sort by", list(SORT_OPTIONS), key=f"{key}_sort", on_change=first_page)
+    page_size = size_col.selectbox("Rows", PAGE_SIZES, index=1, key=f"{key}_size", on_change=first_page)
+    order_col, analysis_col = st.columns([1, 1])
+    descending = order_col.toggle("Descending", key=f"{key}_desc", on_change=first_page)
+    # analysis_json is the heavy column: left out of the query and the page unless asked for
+    show_analysis = analysis_col.toggle("Show analysis_json", key=f"{key}_analysis")
+
+    total = count_contacts(filter_text)
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = st.session_state.get(page_key, 1)
+    return {
+        "columns": COLUMNS if show_analysis else [column for column in COLUMNS if column != "analysis_json"],
+        "sort_by": SORT_OPTIONS[sort_label],
+        "descending": descending,
+        "filter_text": filter_text or None,
+        "limit": page_size,
+        "offset": (page - 1) * page_size,
+    }, total
+
+
+def analysis_inspector(key: str, frame: pd.DataFrame):
+    """
+    Decode and show the analysis_json of one contact on the page, only once it is opened.
+    """
+    if "analysis_json" not in frame.columns or frame.empty:
+        return
+    names = dict(zip(frame["id"].tolist(), frame["Name"].tolist())) if "Name" in frame.columns else {}
+    contact_id = st.selectbox(
+        "Open a contact's analysis",
+        [None] + frame["id"].tolist(),
+        format_func=lambda contact_id: "-" if contact_id is None else f"{names.get(contact_id, '')} (#{contact_id})",
+        key=f"{key}_open"
+    )
+    if contact_id is not None:
+        st.json(analysis_at(frame, contact_id))
+
+
+def contacts_pager(key: str, query: dict, total: int):
+    """
+    Page picker shown under a contacts table (its value is read on the next run).
+    """
+    pages = max(1, -(-total // query["limit"]))
+    page_col, info_col = st.columns([1, 3])
+    page_col.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    first = query["offset"] + 1 if total else 0
+    info_col.caption(f"Showing {first}-{min(total, query['offset'] + query['limit'])} of {total} contacts")
+
+
+def _keeps_position(old: dict, new: dict, query: dict) -> bool:
+    """
+    Whether an edited row stays where it is on the page: its sort key is unchanged
+    and it still matches the filter.
+    """
+    if query["sort_by"] == "updated_at":
+        return False
+    if query["sort_by"] != "id" and old.get(query["sort_by"]) != new.get(query["sort_by"]):
+        return False
+    text = (query["filter_text"] or "").lower()
+    return not text or any(text in (new.get(column) or "").lower() for column in _FILTERED_COLUMNS)
+
+
+def page_rows(key: str, query: dict) -> list:
+    """
+    The rows for one page of a contacts table, kept in session state and brought up
+    to date from the change feed: nothing is read while nothing changed, rows edited
+    in place on the page are re-read on their own, anything else reloads the page.
+    """
+    store = get_store()
+    view = st.session_state.get(f"{key}_view")
+    latest = store.last_change()
+    if view is not None and view["query"] == query:
+        if view["seq"] == latest:
+            return view["rows"]
+        changes = store.changes_since(view["seq"])
+        rows_by_id = {row["id"]: row for row in view["rows"]}
+        if changes is not None and not changes["deleted"] and changes["upserted"] <= rows_by_id.keys():
+            fresh = {row["id"]: row for row in store.get_many(changes["upserted"], decode_analysis=False)}
+            if all(_keeps_position(rows_by_id[contact_id], row, query) for contact_id, row in fresh.items()):
+                rows = [fresh.get(row["id"], row) for row in view["rows"]]
+                st.session_state[f"{key}_view"] = {"query": query, "seq": changes["seq"], "rows": rows}
+                return rows
+    rows = store.page(**query, decode_analysis=False)
+    st.session_state[f"{key}_view"] = {"query": query, "seq": latest, "rows": rows}
+    return rows
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_contacts_table(key: str):
+    """
+    A read-only contacts table with its controls. As a fragment it reruns on its own
+    (controls and periodic refresh alike) without rerunning the rest of the tab.
+    """
+    query, total = contacts_page_query(key)
+    frame = contacts_frame(page_rows(key, query), columns=query["columns"])
+    st.dataframe(frame, hide_index=True, column_config={"id": None, "analysis_json": None})
+    contacts_pager(key, query, total)
+    analysis_inspector(key, frame)
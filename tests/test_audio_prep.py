@@ -0,0 +1,61 @@
+import io
+import wave
+
+import numpy as np
+
+from audio_prep import TARGET_SAMPLE_RATE, prepare_audio
+
+
+def _stereo_wav(rate=44_100):
+    """
+    1 s of silence, 1 s of a 440 Hz tone (louder on the left), 1 s of silence.
+    """
+    t = np.arange(rate) / rate
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    mono = np.concatenate([np.zeros(rate), tone, np.zeros(rate)])
+    stereo = np.stack([mono, 0.5 * mono], axis=1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes((stereo * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def _read(prepared):
+    if prepared.mime == "audio/flac":
+        import soundfile
+
+        data, rate = soundfile.read(io.BytesIO(prepared.data))
+        return (1 if data.ndim == 1 else data.shape[1]), rate, len(data)
+    with wave.open(io.BytesIO(prepared.data), "rb") as wav:
+        return wav.getnchannels(), wav.getframerate(), wav.getnframes()
+
+
+def test_stereo_44k_is_downmixed_resampled_and_trimmed():
+    original = _stereo_wav()
+    prepared = prepare_audio(original, "note.wav")
+
+    channels, rate, frames = _read(prepared)
+    assert (channels, rate) == (1, TARGET_SAMPLE_RATE)
+    # The tone plus 0.25 s of padding either side
+    assert abs(frames / rate - 1.5) < 0.05
+    assert abs(prepared.duration_s - 3.0) < 0.01
+    assert abs(prepared.trimmed_s - 1.5) < 0.05
+    assert prepared.original_bytes == len(original)
+    assert len(prepared.data) < len(original) / 5
+    assert prepared.filename in ("note.wav", "note.flac")
+
+
+def test_non_wav_and_silence_pass_through():
+    assert prepare_audio(b"ID3 not a wav", "note.mp3").data == b"ID3 not a wav"
+    silent = io.BytesIO()
+    with wave.open(silent, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(44_100)
+        wav.writeframes(b"\0" * 4 * 44_100)
+    prepared = prepare_audio(silent.getvalue(), "quiet.wav")
+    assert prepared.data == silent.getvalue()
+    assert prepared.mime == "audio/wav"
@@ -0,0 +1,30 @@
+import bulk_import
+from contact_store import ContactStore
+from dedupe import Resolver
+
+
+def _person(name):
+    return {"Name": name, "last_recommendation": "", "other_interesting_items": "chess"}
+
+
+def test_notes_without_people_bypass_the_resolver(monkeypatch):
+    transcripts = {"jane.wav": "Met Jane", "blank1.wav": "mumble", "blank2.wav": "static"}
+    monkeypatch.setattr(bulk_import, "transcribe_all", lambda client, files, **kwargs: [
+        (filename, transcripts[filename], None) for filename, _ in files
+    ])
+    monkeypatch.setattr(bulk_import, "extract_files", lambda client, batch, **kwargs: [
+        (filename, transcript, [_person("Jane Doe")] if filename == "jane.wav" else [], None)
+        for filename, transcript in batch
+    ])
+    store = ContactStore(":memory:")
+    store.add(_person("Jane Doe"))
+    resolver, resolved = Resolver.from_store(store), []
+    upsert_many = resolver.upsert_many
+    monkeypatch.setattr(resolver, "upsert_many", lambda rows: resolved.extend(rows) or upsert_many(rows))
+
+    summary = bulk_import.bulk_import(store, object(), [(filename, b"") for filename in transcripts], resolver=resolver)
+
+    assert (summary["written"], summary["merged"]) == (3, 1)
+    assert [row["Name"] for row in resolved] == ["Jane Doe"]
+    assert sorted(name for _, name in store.names()) == ["", "", "Jane Doe"]
+    assert [entry["payload"]["text"] for entry in store.interactions(1) if entry["kind"] == "transcript"] == ["Met Jane"]
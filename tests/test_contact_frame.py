@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from contact_frame import _RAW, _ZLIB, analysis_at, contacts_frame, pack_analysis, unpack_analysis
+from contact_store import ContactStore
+
+EXTRACTION = {
+    "Name": "Zoë O'Neil",
+    "last_recommendation": "Send her the Warhol catalogue",
+    "other_interesting_items": "painting, football, 日本語",
+    "people": [],
+    "history": [{"extraction": {"Name": "Zoe"}}],
+}
+
+
+@pytest.mark.parametrize("value", [EXTRACTION, {}, {"a": 1}])
+def test_pack_round_trip(value):
+    packed = pack_analysis(value)
+    assert unpack_analysis(packed) == value
+    assert packed[:1] in (_RAW, _ZLIB)
+
+
+def test_pack_compresses_and_accepts_stored_json_text():
+    text = json.dumps(EXTRACTION)
+    packed = pack_analysis(text)
+    assert packed[:1] == _ZLIB
+    assert len(packed) < len(text.encode("utf-8"))
+    assert unpack_analysis(packed) == EXTRACTION
+    assert unpack_analysis(b"") == {}
+    assert unpack_analysis(_RAW + b"not json") == {}
+
+
+def test_frame_from_store_rows_decodes_on_demand():
+    store = ContactStore(":memory:")
+    contact_id = store.add(dict(EXTRACTION, analysis_json=EXTRACTION))
+    rows = store.page(columns=["Name", "analysis_json"], decode_analysis=False)
+    frame = contacts_frame(rows, with_version=True, columns=["Name", "analysis_json"])
+    assert frame.loc[0, "Name"] == "Zoë O'Neil"
+    assert analysis_at(frame, contact_id) == EXTRACTION
+    assert analysis_at(frame, contact_id + 1) == {}
@@ -0,0 +1,97 @@
+import pytest
+
+from contact_store import DELETE, UPSERT, ContactStore, StaleRowError
+
+
+def _contact(name, interests="", recommendation=""):
+    return {"Name": name, "other_interesting_items": interests, "last_recommendation": recommendation,
+            "analysis_json": {"Name": name}}
+
+
+@pytest.fixture
+def store():
+    store = ContactStore(":memory:")
+    store.add_many([
+        _contact("bob", "chess"),
+        _contact("Alice", "100% into painting"),
+        _contact("Carol", "football", "Send the 100 club link"),
+        _contact("dave_x", "sailing"),
+    ])
+    return store
+
+
+def test_page_filters_sorts_and_projects(store):
+    rows = store.page(columns=["Name"], sort_by="Name", filter_text="A", limit=2)
+    assert [row["Name"] for row in rows] == ["Alice", "Carol"]
+    assert set(rows[0]) == {"id", "Name", "updated_at", "version"}
+    assert [row["Name"] for row in store.page(columns=["Name"], sort_by="Name", descending=True)] == \
+        ["dave_x", "Carol", "bob", "Alice"]
+    assert [row["id"] for row in store.page(columns=["Name"], limit=2, offset=1)] == [2, 3]
+    assert store.count("A") == 3
+    assert store.count() == 4
+    with pytest.raises(ValueError):
+        store.page(sort_by="analysis_json")
+
+
+def test_filter_wildcards_are_literal(store):
+    assert [row["Name"] for row in store.page(filter_text="100%")] == ["Alice"]
+    assert store.count("100%") == 1
+    assert store.count("e_x") == 1
+    assert store.count("b_b") == 0
+    assert [record["Name"] for record in store.search("%")] == ["Alice"]
+
+
+def test_stale_version_rolls_back_the_whole_change(store):
+    bob, alice = store.get(1), store.get(2)
+    store.update(1, {"other_interesting_items": "chess, go"})
+    assert store.get(1)["version"] == bob["version"] + 1
+
+    notified = []
+    store.subscribe(lambda op, ids: notified.append((op, ids)))
+    with pytest.raises(StaleRowError) as raised:
+        store.apply_changes(
+            updates={2: {"Name": "Alice B"}, 1: {"Name": "Bob"}},
+            added=[_contact("Erin")],
+            deleted=[3],
+            versions={1: bob["version"], 2: alice["version"], 3: store.get(3)["version"]},
+        )
+    assert raised.value.ids == [1]
+    assert store.get(2)["Name"] == "Alice"
+    assert store.get(3) is not None
+    assert store.count() == 4
+    assert notified == []
+    with pytest.raises(StaleRowError):
+        store.update(1, {"Name": "Bob"}, expected_version=bob["version"])
+    assert store.update(1, {"Name": "Bob"}, expected_version=bob["version"] + 1)
+
+
+def test_changes_from_another_connection_reach_this_one(tmp_path):
+    path = str(tmp_path / "contacts.db")
+    ours, theirs = ContactStore(path), ContactStore(path)
+    try:
+        kept, gone = ours.add(_contact("Jane")), ours.add(_contact("John"))
+        seq = ours.last_change()
+        notified = []
+        ours.subscribe(lambda op, ids: notified.append((op, ids)))
+        assert ours.poll() == 0  # our own writes are not reported back to us
+
+        theirs.update(kept, {"Name": "Jane Doe"})
+        new = theirs.add(_contact("Mary"))
+        theirs.delete(gone)
+
+        assert ours.changes_since(seq) == {"seq": ours.last_change(), "upserted": {kept, new}, "deleted": {gone}}
+        assert ours.poll() == 3
+        assert notified == [(DELETE, [gone]), (UPSERT, [kept, new])]
+        assert ours.get(kept)["Name"] == "Jane Doe"
+        assert ours.poll() == 0
+    finally:
+        ours.close()
+        theirs.close()
+
+
+def test_changes_since_asks_for_a_reload_once_the_log_is_pruned(store):
+    seq = store.last_change()
+    store.update(1, {"Name": "Bob"})
+    assert store.prune_changes(older_than=-1) > 0
+    assert store.changes_since(seq) is None
+    assert store.changes_since(store.last_change()) == {"seq": store.last_change(), "upserted": set(), "deleted": set()}
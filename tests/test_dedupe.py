@@ -0,0 +1,91 @@
+import pytest
+
+from contact_store import ContactStore
+from dedupe import Resolver, dedupe_store, is_match
+
+
+def _row(name, interests=""):
+    return {"Name": name, "other_interesting_items": interests}
+
+
+@pytest.mark.parametrize("a, b", [
+    (_row("Jane Doe"), _row("jane doe")),
+    (_row("John Smith"), _row("John Smyth")),
+    (_row("Jon Smith", "chess"), _row("John Smith", "chess club")),
+    (_row("John", "loves painting"), _row("John Smith", "painting, chess")),
+])
+def test_same_person(a, b):
+    assert is_match(a, b)
+
+
+@pytest.mark.parametrize("a, b", [
+    (_row("Mark Jones"), _row("Mary Jones")),
+    (_row("John", "loves painting"), _row("John Smith", "loves football")),
+    (_row("John", "really into the opera"), _row("John Smith", "really into the gym")),
+])
+def test_different_people(a, b):
+    assert not is_match(a, b)
+
+
+class RacingStore(ContactStore):
+    """
+    A store where someone else edits contact 1 just before our first write lands.
+    """
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.raced = False
+
+    def apply_changes(self, **changes):
+        if not self.raced:
+            self.raced = True
+            self.update(1, {"other_interesting_items": "chess, go"})
+        return super().apply_changes(**changes)
+
+
+def _contact(name, interests):
+    return {"Name": name, "last_recommendation": "", "other_interesting_items": interests, "analysis_json": {}}
+
+
+def test_upsert_replans_when_the_matched_row_changed():
+    store = RacingStore()
+    store.add(_contact("Jane Doe", "chess"))
+    contact_ids, merged = Resolver.from_store(store).upsert_many([_contact("Jane Doe", "hobby")])
+    assert (contact_ids, merged) == ([1], 1)
+    assert store.get(1)["other_interesting_items"] == "chess, go, hobby"
+
+
+def test_dedupe_store_keeps_concurrent_edits_and_history():
+    store = RacingStore()
+    store.add(_contact("Jane Doe", "chess"))
+    store.add(_contact("Jane Doe", "hobby"))
+    store.append_interactions([(2, "transcript", {"text": "met Jane"}, 1.0)])
+    assert dedupe_store(store) == 1
+    assert store.count() == 1
+    assert store.get(1)["other_interesting_items"] == "chess, go, hobby"
+    assert [entry["payload"] for entry in store.interactions(1)] == [{"text": "met Jane"}]
+
+
+class StoreWrittenDuringIndexing(ContactStore):
+    """
+    A store where another thread adds a contact right after the resolver has read the names.
+    """
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.raced = False
+
+    def names(self, ids=None):
+        names = super().names(ids)
+        if ids is None and not self.raced:
+            self.raced = True
+            self.add(_contact("Jane Doe", "chess"))
+        return names
+
+
+def test_contact_added_while_indexing_is_merged_into():
+    store = StoreWrittenDuringIndexing()
+    resolver = Resolver.from_store(store)
+    contact_ids, merged = resolver.upsert_many([_contact("Jane Doe", "chess club")])
+    assert (contact_ids, merged) == ([1], 1)
+    assert store.count() == 1
@@ -0,0 +1,30 @@
+from contact_store import ContactStore
+from embeddings import EmbeddingIndex, HashingEmbedder
+
+
+class StoreWrittenDuringScan(ContactStore):
+    """
+    A store where another thread edits contact 1 right after its page was read.
+    """
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.raced = False
+
+    def page(self, **kwargs):
+        rows = super().page(**kwargs)
+        if not self.raced:
+            self.raced = True
+            self.update(1, {"other_interesting_items": "sailing"})
+        return rows
+
+
+def test_from_store_reads_only_the_embedded_columns_and_catches_up():
+    store = StoreWrittenDuringScan()
+    store.add({"Name": "Jane Doe", "other_interesting_items": "painting", "analysis_json": {"big": "x" * 1000}})
+    store.add({"Name": "John Smith", "other_interesting_items": "football"})
+    store.list = None  # the full-table load must not come back
+    index = EmbeddingIndex.from_store(store, HashingEmbedder(), batch_size=1)
+    assert len(index) == 2
+    (best_id, score), = index.who_would_like("sailing", k=1)
+    assert best_id == 1 and score > 0.5
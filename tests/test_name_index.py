@@ -0,0 +1,37 @@
+from contact_store import ContactStore
+from name_index import NameIndex
+
+
+class StoreWrittenDuringLoad(ContactStore):
+    """
+    A store where another thread adds a contact right after the index has read the names.
+    """
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.raced = False
+
+    def names(self, ids=None):
+        names = super().names(ids)
+        if ids is None and not self.raced:
+            self.raced = True
+            self.add({"Name": "Late Arrival"})
+        return names
+
+
+def test_write_during_load_reaches_the_index():
+    store = StoreWrittenDuringLoad()
+    store.add({"Name": "Jane Doe"})
+    index = NameIndex.from_store(store)
+    assert index.lookup("late arrival")
+    assert len(index) == 2
+
+
+def test_index_follows_edits_and_deletes():
+    store = ContactStore(":memory:")
+    contact_id = store.add({"Name": "Jane Doe"})
+    index = NameIndex.from_store(store)
+    store.update(contact_id, {"Name": "Jane Smith"})
+    assert index.search("smith") == [contact_id]
+    store.delete(contact_id)
+    assert len(index) == 0
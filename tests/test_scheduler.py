@@ -0,0 +1,57 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import scheduler
+from scheduler import ScheduledClient, Scheduler
+
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+
+def _client(api_key, create):
+    completions = SimpleNamespace(create=create)
+    return SimpleNamespace(api_key=api_key, base_url=None, chat=SimpleNamespace(completions=completions))
+
+
+def test_identical_calls_are_coalesced_per_api_key():
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        time.sleep(0.1)
+        return "ok"
+
+    shared = Scheduler(limits={}, default_rpm=600, default_tpm=None)
+    first, second = ScheduledClient(_client("a", create), shared), ScheduledClient(_client("b", create), shared)
+    callers = [
+        threading.Thread(target=client.chat.completions.create, kwargs={"model": "m", "messages": []})
+        for client in (first, first, second)
+    ]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert len(calls) == 2
+    assert len(shared._buckets) == 2
+
+
+def test_retry_waits_at_least_retry_after(monkeypatch):
+    sleeps, attempts = [], []
+    monkeypatch.setattr(scheduler.time, "sleep", sleeps.append)
+
+    def create(**kwargs):
+        attempts.append(kwargs)
+        if len(attempts) == 1:
+            raise RateLimitError(retry_after=0.05)
+        return "ok"
+
+    client = ScheduledClient(_client("a", create), Scheduler(limits={}, default_rpm=600, default_tpm=None))
+    assert client.chat.completions.create(model="m", messages=[]) == "ok"
+    assert len(sleeps) == 1
+    assert 0.05 <= sleeps[0] <= 0.075
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import metrics
+from suggestions import SUGGESTION_MODEL, iter_json_array_items, stream_suggestions
+
+
+def _chunk(content=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def _client(stream):
+    create = lambda **kwargs: stream  # noqa: E731
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def _tokens():
+    return {
+        row["labels"]: row["value"] for row in metrics.registry.counters() if row["name"] == "openai_tokens_total"
+    }
+
+
+def test_parser_yields_items_as_they_complete():
+    chunks = ['```json\n["Buy ', 'tickets", {"a": [1, "]"]}', ', "Say \\"hi\\""', ', oops', ']', ' trailing']
+    assert list(iter_json_array_items(chunks)) == ["Buy tickets", {"a": [1, "]"]}, 'Say "hi"']
+
+
+def test_stream_records_usage_sent_after_the_array():
+    metrics.registry.reset()
+    usage = SimpleNamespace(prompt_tokens=12, completion_tokens=7)
+    stream = FakeStream([_chunk('["Call'), _chunk(' her", "Send'), _chunk(' a book"]'), _chunk(usage=usage)])
+
+    assert list(stream_suggestions(_client(stream), "chess")) == ["Call her", "Send a book"]
+    assert stream.read == 4
+    assert stream.closed
+    assert _tokens() == {
+        f"kind=completion, model={SUGGESTION_MODEL}": 7,
+        f"kind=prompt, model={SUGGESTION_MODEL}": 12,
+    }
+
+
+def test_stream_is_closed_when_the_caller_stops_early():
+    stream = FakeStream([_chunk('["One", '), _chunk('"Two"]')])
+    suggestions = stream_suggestions(_client(stream), "chess")
+    assert next(suggestions) == "One"
+    suggestions.close()
+    assert stream.closed
@@ -0,0 +1,39 @@
+from contact_store import ContactStore
+from triggers import TriggerEngine, TriggerIndex
+
+
+def test_rules_match_interests_only():
+    engine = TriggerEngine()
+    alice = {
+        "other_interesting_items": "Tech startup founder, loves painting",
+        "last_recommendation": "Catch up over coffee next week",
+    }
+    assert engine.match_record(alice) == ("painting",)
+    assert engine.match_record({"other_interesting_items": "Arsenal Football club, paintings"}) == ("painting", "football")
+    assert engine.match_record({"other_interesting_items": "jazz", "last_recommendation": "football"}) == ()
+    assert engine.match_record({"other_interesting_items": "oil-/watercolourpainting"}) == ("painting",)
+
+
+class StoreEditedDuringLoad(ContactStore):
+    """
+    A store where another thread edits contact 1 right after its page was read.
+    """
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.raced = False
+
+    def page(self, **kwargs):
+        rows = super().page(**kwargs)
+        if not self.raced:
+            self.raced = True
+            self.update(1, {"other_interesting_items": "football"})
+        return rows
+
+
+def test_index_loads_interests_only_and_catches_up():
+    store = StoreEditedDuringLoad()
+    store.add({"Name": "Jane Doe", "other_interesting_items": "painting"})
+    store.list = None  # the full-table load must not come back
+    index = TriggerIndex.from_store(store)
+    assert [rule["id"] for rule in index.actions_for(1)] == ["football"]
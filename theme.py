@@ -0,0 +1,64 @@
+"""
+Light and dark theme CSS, built once per process from one template; each
+rerun only injects the chosen string.
+"""
+from string import Template
+
+import streamlit as st
+
+_TEMPLATE = Template("""
+<style>
+/* Apply the theme to the entire app */
+html, body, [data-testid="stAppViewContainer"] {
+    background-color: $background;
+    color: $text;
+}
+/* Sidebar styling */
+[data-testid="stSidebar"] {
+    background: $sidebar;
+}
+/* Ensure sidebar text follows the theme */
+[data-testid="stSidebar"] * {
+    color: $text !important;
+}
+/* Main container styling */
+.main .block-container {
+    background-color: $container;
+    padding: 2rem;
+    border-radius: 8px;
+    box-shadow: 0 1px 3px $shadow;
+}
+h1, h2, h3 {
+    font-family: "Segoe UI", sans-serif;
+}
+button, input {
+    background-color: $control !important;
+    color: $text !important;
+}
+</style>
+""")
+
+_PALETTES = {
+    "Light": {
+        "background": "#ffffff",
+        "text": "#000000",
+        "sidebar": "linear-gradient(#fdf9ff, #e6f7f7)",
+        "container": "#ffffff",
+        "shadow": "rgba(0,0,0,0.1)",
+        "control": "#eeeeee",
+    },
+    "Dark": {
+        "background": "#222222",
+        "text": "#EEEEEE",
+        "sidebar": "linear-gradient(#2c2f33, #23272a)",
+        "container": "#333333",
+        "shadow": "rgba(0,0,0,0.3)",
+        "control": "#444444",
+    },
+}
+
+THEME_CSS = {mode: _TEMPLATE.substitute(palette) for mode, palette in _PALETTES.items()}
+
+
+def apply_theme(mode: str):
+    st.markdown(THEME_CSS[mode], unsafe_allow_html=True)
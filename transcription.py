@@ -0,0 +1,185 @@
+"""
+Speech-to-text backends for the pipeline.
+
+Every backend has a `name` and `transcribe(audio_bytes, filename) -> str`:
+
+    OpenAITranscriber         Whisper through the OpenAI API
+    LocalWhisperTranscriber   a quantized (int8) Whisper model on the CPU, run in a
+                              process pool; needs the optional `faster-whisper` package
+    FallbackTranscriber       tries one backend and falls back to another when the
+                              first is slow, rate-limited or unreachable
+
+make_transcriber(client) picks one from the environment:
+
+    FORGET_ME_NOT_TRANSCRIBER           "openai", "local" or "auto" (default): auto uses the
+                                        API and falls back to the local model if it is installed
+    FORGET_ME_NOT_TRANSCRIBE_TIMEOUT    seconds to wait for the API before falling back (default 20)
+    FORGET_ME_NOT_LOCAL_WHISPER_MODEL   faster-whisper model size or path (default "base")
+    FORGET_ME_NOT_LOCAL_WORKERS         local transcription processes (default 2)
+    FORGET_ME_NOT_LOCAL_SHORT_NOTE_SECONDS
+                                        in auto mode, WAV notes up to this long go straight
+                                        to the local model (default 0, i.e. never)
+"""
+import importlib.util
+import io
+import multiprocessing
+import os
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+from scheduler import is_retryable
+
+TRANSCRIPTION_MODEL = "whisper-1"
+
+TRANSCRIBER = os.environ.get("FORGET_ME_NOT_TRANSCRIBER", "auto")
+TRANSCRIBE_TIMEOUT = float(os.environ.get("FORGET_ME_NOT_TRANSCRIBE_TIMEOUT", "20"))
+LOCAL_WHISPER_MODEL = os.environ.get("FORGET_ME_NOT_LOCAL_WHISPER_MODEL", "base")
+LOCAL_WORKERS = int(os.environ.get("FORGET_ME_NOT_LOCAL_WORKERS", "2"))
+LOCAL_SHORT_NOTE_SECONDS = float(os.environ.get("FORGET_ME_NOT_LOCAL_SHORT_NOTE_SECONDS", "0"))
+
+
+class OpenAITranscriber:
+    name = "openai"
+
+    def __init__(self, client, model: str = TRANSCRIPTION_MODEL, timeout: float = None):
+        # With a timeout, fail fast (no SDK retries) so a fallback can take over
+        self.client = client if timeout is None else client.with_options(timeout=timeout, max_retries=0)
+        self.model = model
+
+    def transcribe(self, audio_bytes: bytes, filename: str = "voice_note.wav") -> str:
+        with metrics.span("openai_request", endpoint="audio.transcriptions", model=self.model):
+            response = self.client.audio.transcriptions.create(model=self.model, file=(filename, audio_bytes))
+        return response.text
+
+
+# -----------------------------------------------------------------------------
+# Local CPU transcription (runs in worker processes)
+# -----------------------------------------------------------------------------
+_worker_model = None
+
+
+def _load_worker_model(model: str, compute_type: str):
+    global _worker_model
+    from faster_whisper import WhisperModel
+
+    _worker_model = WhisperModel(model, device="cpu", compute_type=compute_type, cpu_threads=1)
+
+
+def _transcribe_in_worker(audio_bytes: bytes) -> str:
+    segments, _ = _worker_model.transcribe(io.BytesIO(audio_bytes), beam_size=1, vad_filter=True)
+    return " ".join(segment.text.strip() for segment in segments)
+
+
+class LocalWhisperTranscriber:
+    """
+    faster-whisper with int8 weights in a pool of `workers` processes, each
+    loading the model once. Transcription is CPU-bound, so processes (not
+    threads) are what lets several notes run at once.
+    """
+
+    name = "local"
+
+    def __init__(self, model: str = LOCAL_WHISPER_MODEL, workers: int = LOCAL_WORKERS, compute_type: str = "int8"):
+        if not self.available():
+            raise RuntimeError("Local transcription needs the faster-whisper package (pip install faster-whisper)")
+        self.model = model
+        # spawn: forking a process that already runs Streamlit's threads is not safe
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_load_worker_model,
+            initargs=(model, compute_type),
+        )
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def transcribe(self, audio_bytes: bytes, filename: str = "voice_note.wav") -> str:
+        with metrics.span("local_transcribe", model=self.model):
+            return self._pool.submit(_transcribe_in_worker, bytes(audio_bytes)).result()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_local = None
+_local_lock = threading.Lock()
+
+
+def get_local_transcriber():
+    """
+    The process-wide local transcriber (its worker pool is started on first use).
+    """
+    global _local
+    with _local_lock:
+        if _local is None:
+            _local = LocalWhisperTranscriber()
+        return _local
+
+
+# -----------------------------------------------------------------------------
+# Fallback
+# -----------------------------------------------------------------------------
+def wav_duration(audio_bytes: bytes):
+    """
+    Length of a WAV recording in seconds, or None for anything else.
+    """
+    if audio_bytes[:4] != b"RIFF":
+        return None
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError):
+        return None
+
+
+class FallbackTranscriber:
+    """
+    Use `primary`, and `fallback` whenever the primary times out, is rate-limited
+    or cannot be reached. Notes up to `short_note_seconds` skip the primary.
+    """
+
+    def __init__(self, primary, fallback, short_note_seconds: float = 0.0):
+        self.primary = primary
+        self.fallback = fallback
+        self.short_note_seconds = short_note_seconds
+        self.name = f"{primary.name}+{fallback.name}"
+
+    def transcribe(self, audio_bytes: bytes, filename: str = "voice_note.wav") -> str:
+        if self.short_note_seconds:
+            duration = wav_duration(audio_bytes)
+            if duration is not None and duration <= self.short_note_seconds:
+                metrics.inc("transcription_fallbacks_total", reason="short_note")
+                return self.fallback.transcribe(audio_bytes, filename)
+        try:
+            return self.primary.transcribe(audio_bytes, filename)
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            metrics.inc("transcription_fallbacks_total", reason=type(e).__name__)
+            return self.fallback.transcribe(audio_bytes, filename)
+
+
+def make_transcriber(client, backend: str = None):
+    """
+    The transcription backend configured by FORGET_ME_NOT_TRANSCRIBER (or `backend`).
+    """
+    backend = backend or TRANSCRIBER
+    if backend == "openai":
+        return OpenAITranscriber(client)
+    if backend == "local":
+        return get_local_transcriber()
+    if backend != "auto":
+        raise ValueError(f"Unknown transcription backend {backend!r} (expected openai, local or auto)")
+    if client is None:
+        return get_local_transcriber()
+    if not LocalWhisperTranscriber.available():
+        return OpenAITranscriber(client)
+    return FallbackTranscriber(
+        OpenAITranscriber(client, timeout=TRANSCRIBE_TIMEOUT),
+        get_local_transcriber(),
+        short_note_seconds=LOCAL_SHORT_NOTE_SECONDS,
+    )
@@ -0,0 +1,135 @@
+"""
+Interest triggers: what Basil can do for a contact, decided by a rules table.
+
+Every rule's keywords are compiled into one case-insensitive regex with a named
+group per rule, so a contact's text is scanned once no matter how many rules
+there are. TriggerIndex keeps the resulting contact -> actions mapping (and its
+inverse, action -> contacts) for the whole store and follows every write, so
+"what can Basil do for everyone?" is a lookup rather than a scan.
+"""
+import re
+import threading
+
+from contact_store import DELETE
+
+# Keywords match case-insensitively anywhere in the text, like the original `"painting" in text.lower()`
+TRIGGER_RULES = [
+    {
+        "id": "painting",
+        "keywords": ["painting"],
+        "action": "Reserve tickets for the Warhol exhibit at the Tate Modern",
+        "messages": ["The Tate Modern has a Warhol exhibit next week", "I have reserved some tickets for you!"],
+        "done": "## Tickets Reserved ✅",
+    },
+    {
+        "id": "football",
+        "keywords": ["football"],
+        "action": "Book tickets for the next football match",
+        "messages": ["#### Football Detected - Searching next match...Booking next match..."],
+        "done": "## Booked ✅",
+    },
+]
+
+
+def contact_trigger_text(record: dict) -> str:
+    return record.get("other_interesting_items") or ""
+
+
+class TriggerEngine:
+    """
+    The rules table compiled into a single regex.
+    """
+
+    def __init__(self, rules: list = None):
+        self.rules = list(rules if rules is not None else TRIGGER_RULES)
+        self.rules_by_id = {rule["id"]: rule for rule in self.rules}
+        self._group_rule = {}
+        alternatives = []
+        for position, rule in enumerate(self.rules):
+            group = f"r{position}"
+            self._group_rule[group] = rule["id"]
+            # Longest keywords first so the alternation prefers the most specific match
+            keywords = sorted(rule["keywords"], key=len, reverse=True)
+            alternatives.append(f"(?P<{group}>{'|'.join(re.escape(keyword) for keyword in keywords)})")
+        self._pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+
+    def match(self, text: str) -> tuple:
+        """
+        Ids of the rules whose keywords appear in `text`, in rules-table order.
+        """
+        if not text or self._pattern is None:
+            return ()
+        hits = {self._group_rule[match.lastgroup] for match in self._pattern.finditer(text)}
+        return tuple(rule["id"] for rule in self.rules if rule["id"] in hits)
+
+    def match_record(self, record: dict) -> tuple:
+        return self.match(contact_trigger_text(record))
+
+
+class TriggerIndex:
+    """
+    contact id -> matching rule ids, and rule id -> contact ids, for the whole store.
+    """
+
+    def __init__(self, engine: TriggerEngine = None, store=None):
+        self.engine = engine or TriggerEngine()
+        self._store = store
+        self._lock = threading.RLock()
+        self._actions = {}
+        self._contacts = {rule["id"]: set() for rule in self.engine.rules}
+
+    @classmethod
+    def from_store(cls, store, engine: TriggerEngine = None):
+        index = cls(engine, store)
+        seq = store.last_change()
+        for batch in store.scan(["other_interesting_items"]):
+            index.update(batch)
+        # Writes made while loading are replayed, so no contact's actions go missing
+        store.subscribe(index.on_store_change)
+        store.replay(index.on_store_change, seq)
+        return index
+
+    def update(self, records: list):
+        matches = [(record["id"], self.engine.match_record(record)) for record in records]
+        with self._lock:
+            for contact_id, rule_ids in matches:
+                self._set(contact_id, rule_ids)
+
+    def remove(self, ids: list):
+        with self._lock:
+            for contact_id in ids:
+                self._set(contact_id, ())
+
+    def _set(self, contact_id: int, rule_ids: tuple):
+        for rule_id in self._actions.pop(contact_id, ()):
+            self._contacts[rule_id].discard(contact_id)
+        if rule_ids:
+            self._actions[contact_id] = rule_ids
+            for rule_id in rule_ids:
+                self._contacts[rule_id].add(contact_id)
+
+    def on_store_change(self, op: str, ids: list):
+        if op == DELETE:
+            self.remove(ids)
+            return
+        self.update(self._store.get_many(ids, decode_analysis=False))
+
+    def actions_for(self, contact_id: int) -> list:
+        """
+        The rules (from the rules table) that apply to one contact.
+        """
+        with self._lock:
+            rule_ids = self._actions.get(contact_id, ())
+        return [self.engine.rules_by_id[rule_id] for rule_id in rule_ids]
+
+    def plan(self) -> list:
+        """
+        Everything Basil can do for everyone: (rule, sorted contact ids) for each
+        rule that applies to at least one contact, in rules-table order.
+        """
+        with self._lock:
+            return [
+                (rule, sorted(self._contacts[rule["id"]]))
+                for rule in self.engine.rules
+                if self._contacts[rule["id"]]
+            ]